@@ -249,28 +249,28 @@ class DigitizationProject:
     # --- Методы обработки данных ---
     def interpolate_all_intervals(self) -> Dict[str, bool]:
         """Интерполирует все интервалы в проекте."""
-        results = {}
+        from utils.interpolation import interpolate_points
 
-        # Интервалы в трассах
-        for trace in self.traces:
-            for interval in trace.intervals:
-                success = self._interpolate_interval(interval)
-                results[f"{trace.id}/{interval.id}"] = success
+        # Собираем интервалы трасс и свободные интервалы в один проход
+        jobs = [(f"{trace.id}/{interval.id}", interval)
+                for trace in self.traces for interval in trace.intervals]
+        jobs.extend((interval.id, interval) for interval in self.loose_intervals)
 
-        # Свободные интервалы
-        for interval in self.loose_intervals:
-            success = self._interpolate_interval(interval)
-            results[interval.id] = success
+        results = {}
+        for key, interval in jobs:
+            results[key] = self._interpolate_interval(interval, interpolate_points)
 
         return results
 
-    def _interpolate_interval(self, interval: DigitizationInterval) -> bool:
+    def _interpolate_interval(self, interval: DigitizationInterval,
+                              interpolate_points=None) -> bool:
         """Интерполирует один интервал."""
         if len(interval.points) < 2:
             return False
 
         try:
-            from utils.interpolation import interpolate_points
+            if interpolate_points is None:
+                from utils.interpolation import interpolate_points
 
             x_interp, y_interp = interpolate_points(
                 interval.points,
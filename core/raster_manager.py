@@ -2,22 +2,148 @@
 
 import numpy as np
 from PIL import Image, ImageEnhance, ImageFilter
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QImage, QPixmap
-from PyQt5.QtOpenGL import QGLWidget, QGLFormat
+from PyQt5.QtCore import Qt, QPointF, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap, QSurfaceFormat
+from PyQt5.QtWidgets import QOpenGLWidget
 from OpenGL.GL import *
 from OpenGL.GLU import *
 from typing import Tuple, Optional, List
 import warnings
+import ctypes
+from collections import deque
+
+# Режим PIL -> режим, в который изображение переводится перед загрузкой в текстуру.
+# Режимы, которых нет в таблице (L, RGB, RGBA), используются как есть:
+# градации серого остаются одноканальными, альфа не добавляется
+MODE_CONVERSIONS = {
+    'P': 'RGB',   # Palette
+    '1': 'L',     # Binary
+}
+
+
+def _decode_image(image_path: str) -> Image.Image:
+    """Открывает и полностью декодирует изображение, приводя его к L, RGB или RGBA."""
+    pil_image = Image.open(image_path)
+
+    target_mode = MODE_CONVERSIONS.get(pil_image.mode)
+    if pil_image.mode == 'P' and 'transparency' in pil_image.info:
+        # Альфа нужна только палитре с прозрачностью
+        target_mode = 'RGBA'
+    if target_mode is not None:
+        pil_image = pil_image.convert(target_mode)
+    else:
+        pil_image.load()
+
+    return pil_image
+
+
+# Наибольшая сторона грубого превью, показываемого до готовности полного изображения
+PREVIEW_MAX_SIZE = 2048
+
+
+# Шейдеры тонового преобразования: исходная текстура проходит через
+# таблицу из 256 значений (яркость/контраст/гамма/инверсия) и порог на GPU,
+# поэтому смена настроек не требует повторной обработки всего изображения
+_TONE_VERTEX_SHADER = """
+#version 120
+varying vec2 v_uv;
+void main() {
+    v_uv = gl_MultiTexCoord0.st;
+    gl_Position = gl_ModelViewProjectionMatrix * gl_Vertex;
+}
+"""
+
+_TONE_FRAGMENT_SHADER = """
+#version 120
+uniform sampler2D u_image;
+uniform sampler2D u_lut;
+uniform float u_threshold;  // < 0 - бинаризация выключена
+varying vec2 v_uv;
+
+float tone(float v) {
+    return texture2D(u_lut, vec2((v * 255.0 + 0.5) / 256.0, 0.5)).r;
+}
+
+void main() {
+    vec4 texel = texture2D(u_image, v_uv);
+    vec3 c = texel.rgb;
+    c = vec3(tone(c.r), tone(c.g), tone(c.b));
+    if (u_threshold >= 0.0) {
+        float luma = dot(c, vec3(0.299, 0.587, 0.114)) * 255.0;
+        c = vec3(luma > u_threshold ? 1.0 : 0.0);
+    }
+    gl_FragColor = vec4(c, texel.a);
+}
+"""
+
+
+# Форматы загрузки текстуры: (raw-режим PIL, внутренний формат, формат, тип).
+# RGBA передается как BGRA + 8_8_8_8_REV - в таком виде большинство
+# драйверов хранит текстуры и копирует данные без перестановки каналов.
+# В OpenGL ES GL_BGRA не входит в ядро - там нужен GL_RGBA/GL_UNSIGNED_BYTE
+_UPLOAD_FORMATS = {
+    'L': ('L', GL_LUMINANCE8, GL_LUMINANCE, GL_UNSIGNED_BYTE),
+    'RGBA': ('BGRA', GL_RGBA8, GL_BGRA, GL_UNSIGNED_INT_8_8_8_8_REV),
+}
+_DEFAULT_UPLOAD_FORMAT = ('RGB', GL_RGB8, GL_RGB, GL_UNSIGNED_BYTE)
+
+
+class _DecodeSignals(QObject):
+    preview = pyqtSignal(int, object, object)  # Номер загрузки, превью PIL, полный размер
+    decoded = pyqtSignal(int, object)  # Номер загрузки, изображение PIL
+    failed = pyqtSignal(int, str)
+
+
+class ImageDecodeTask(QRunnable):
+    """Декодирует файл изображения в фоновом потоке пула."""
+
+    def __init__(self, image_path: str, generation: int):
+        super().__init__()
+        self.image_path = image_path
+        self.generation = generation
+        self.signals = _DecodeSignals()
+
+    def run(self):
+        try:
+            preview_sent = False
+            with Image.open(self.image_path) as img:
+                full_size = img.size
+                if img.format == 'JPEG' and max(full_size) > PREVIEW_MAX_SIZE:
+                    # JPEG умеет декодироваться сразу в уменьшенном масштабе
+                    mode = 'L' if img.mode == 'L' else 'RGB'
+                    img.draft(mode, (PREVIEW_MAX_SIZE, PREVIEW_MAX_SIZE))
+                    preview = img.convert(mode)
+                    preview.thumbnail((PREVIEW_MAX_SIZE, PREVIEW_MAX_SIZE))
+                    self.signals.preview.emit(self.generation, preview, full_size)
+                    preview_sent = True
+
+            pil_image = _decode_image(self.image_path)
+            if not preview_sent and max(full_size) > PREVIEW_MAX_SIZE:
+                preview = pil_image.copy()
+                preview.thumbnail((PREVIEW_MAX_SIZE, PREVIEW_MAX_SIZE))
+                self.signals.preview.emit(self.generation, preview, full_size)
+        except Exception as e:
+            self.signals.failed.emit(self.generation, str(e))
+            return
+        self.signals.decoded.emit(self.generation, pil_image)
+
 
-class RasterManager(QGLWidget):
+class RasterManager(QOpenGLWidget):
     """Виджет OpenGL для отображения и обработки растровых изображений."""
 
+    # Результат фоновой загрузки (load_image_async)
+    image_ready = pyqtSignal(bool)
+
     def __init__(self, parent=None):
-        format = QGLFormat()
-        format.setSampleBuffers(True)
+        super().__init__(parent)
+        # Профиль совместимости: отрисовка использует матрицы и клиентские
+        # массивы фиксированного конвейера, шейдер - GLSL 1.20
+        format = QSurfaceFormat()
+        format.setVersion(2, 1)
+        format.setProfile(QSurfaceFormat.CompatibilityProfile)
         format.setSamples(4)  # 4x сглаживание
-        super().__init__(format, parent)
+        format.setSwapInterval(1)
+        self.setFormat(format)
 
         self.image_texture = None
         self.texture_width = 0
@@ -27,6 +153,9 @@ class RasterManager(QGLWidget):
         self.pan_y = 0.0
         self.image_loaded = False
 
+        # Последняя позиция мыши (дробная, без округления до пикселя)
+        self.last_mouse_pos = QPointF()
+
         # Настройки обработки изображения
         self.brightness = 1.0
         self.contrast = 1.0
@@ -35,6 +164,76 @@ class RasterManager(QGLWidget):
         self.threshold = 0
         self.threshold_enabled = False
 
+        # Геометрия квада изображения (полоса из двух треугольников) в VBO:
+        # чередующиеся (x, y, u, v); буфер обновляется только при смене
+        # размера текстуры
+        self._quad_size = None
+        self._quad_vbo = None
+
+        # Счетчики кадров: отрисованных и пропущенных (изображение вне окна)
+        self.drawn_frames = 0
+        self.culled_frames = 0
+
+        # Буфер распаковки пикселей (PBO) для загрузки текстуры
+        self._pbo = None
+        # Постоянно отображенный буфер (GL 4.4 / ARB_buffer_storage):
+        # указатель, емкость и барьер последней загрузки из него
+        self._persistent_supported = None
+        self._persistent_ptr = None
+        self._persistent_capacity = 0
+        self._upload_fence = None
+
+        # Декодированное изображение без обработки (источник для reload_texture)
+        self._source_image = None
+        # Размер хранилища текстуры в пикселях; texture_width/height - размер
+        # изображения на экране (у грубого превью они различаются)
+        self._texture_storage_size = None
+        # Для текущей загрузки уже показано грубое превью
+        self._preview_shown = False
+        # (исходник, настройки), с которыми собрана текущая текстура
+        self._uploaded_key = None
+
+        # Изменения настроек обработки за один кадр (~16 мс) сливаются
+        # в одну перезагрузку текстуры
+        self._reload_timer = QTimer(self)
+        self._reload_timer.setSingleShot(True)
+        self._reload_timer.setInterval(16)
+        self._reload_timer.timeout.connect(self.reload_texture)
+
+        # Видимая область в координатах изображения; пересчитывается только
+        # при изменении масштаба, сдвига или размера окна
+        self._viewport_cache_key = None
+        self._viewport_cache = None
+
+        # Очередь загрузок текстуры: выполняются в paintGL, где контекст уже
+        # текущий. Текстура одна, поэтому важна только последняя загрузка
+        self._upload_queue = deque(maxlen=1)
+        # Таблицу шейдера нужно перезагрузить при следующей отрисовке
+        self._lut_dirty = False
+
+        # Фоновое декодирование: результаты устаревших загрузок отбрасываются
+        self._load_generation = 0
+        self._decode_task = None
+
+        # Шейдер тонового преобразования (None - обработка на CPU)
+        self._program = None
+        self._program_checked = False
+        self._lut_texture = None
+        # Гистограмма яркости исходника для контраста: (исходник, гистограмма)
+        self._histogram_cache = (None, None)
+
+    @property
+    def zoom_factor(self) -> float:
+        """Масштаб отображения."""
+        return self._zoom_factor
+
+    @zoom_factor.setter
+    def zoom_factor(self, value: float):
+        # Обратный масштаб считается один раз при изменении, а не при
+        # каждом событии мыши
+        self._zoom_factor = value
+        self._inv_zoom = 1.0 / value
+
     def initializeGL(self):
         """Инициализация OpenGL."""
         glClearColor(0.2, 0.2, 0.2, 1.0)
@@ -42,6 +241,45 @@ class RasterManager(QGLWidget):
         glEnable(GL_BLEND)
         glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
 
+    def _ensure_program(self):
+        """Компилирует шейдер при первом обращении; при ошибке остается обработка на CPU."""
+        if self._program_checked:
+            return
+        self._program_checked = True
+        try:
+            from OpenGL.GL import shaders
+            self._program = shaders.compileProgram(
+                shaders.compileShader(_TONE_VERTEX_SHADER, GL_VERTEX_SHADER),
+                shaders.compileShader(_TONE_FRAGMENT_SHADER, GL_FRAGMENT_SHADER)
+            )
+            self._u_image = glGetUniformLocation(self._program, 'u_image')
+            self._u_lut = glGetUniformLocation(self._program, 'u_lut')
+            self._u_threshold = glGetUniformLocation(self._program, 'u_threshold')
+
+            self._lut_texture = glGenTextures(1)
+            glBindTexture(GL_TEXTURE_2D, self._lut_texture)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+            glBindTexture(GL_TEXTURE_2D, 0)
+        except Exception as e:
+            print(f"Шейдеры недоступны, обработка изображения на CPU: {e}")
+            self._program = None
+
+    def _update_lut(self, source: Optional[Image.Image] = None):
+        """Загружает таблицу тонового преобразования для шейдера (256 байт)."""
+        if source is None:
+            source = self._source_image
+        lut = self._build_tone_lut(source)
+        if lut is None:
+            lut = np.arange(256, dtype=np.uint8)
+
+        glBindTexture(GL_TEXTURE_2D, self._lut_texture)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_LUMINANCE, 256, 1, 0,
+                     GL_LUMINANCE, GL_UNSIGNED_BYTE, lut.tobytes())
+        glBindTexture(GL_TEXTURE_2D, 0)
+
     def resizeGL(self, width, height):
         """Обработка изменения размера виджета."""
         glViewport(0, 0, width, height)
@@ -52,131 +290,454 @@ class RasterManager(QGLWidget):
 
     def paintGL(self):
         """Отрисовка сцены."""
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        # Тест глубины не используется - очищается только цвет
+        glClear(GL_COLOR_BUFFER_BIT)
         glLoadIdentity()
+        self._drain_uploads()
 
         if self.image_texture and self.image_loaded:
+            # Изображение целиком за пределами окна - рисовать нечего
+            if self._is_offscreen():
+                self.culled_frames += 1
+                return
+            self.drawn_frames += 1
+
             # Применяем трансформации (масштабирование и панорамирование)
             glTranslatef(self.pan_x, self.pan_y, 0)
             glScalef(self.zoom_factor, self.zoom_factor, 1.0)
 
-            # Рисуем текстуру
+            # Рисуем текстуру одним вызовом glDrawArrays вместо glBegin/glEnd;
+            # квад уже собран при загрузке текстуры
+            if self._program is not None:
+                glUseProgram(self._program)
+                glUniform1i(self._u_image, 0)
+                glUniform1i(self._u_lut, 1)
+                enabled = self.threshold_enabled and self.threshold > 0
+                glUniform1f(self._u_threshold, float(self.threshold) if enabled else -1.0)
+                glActiveTexture(GL_TEXTURE1)
+                glBindTexture(GL_TEXTURE_2D, self._lut_texture)
+                glActiveTexture(GL_TEXTURE0)
+
             glBindTexture(GL_TEXTURE_2D, self.image_texture)
-            glBegin(GL_QUADS)
-            glTexCoord2f(0, 1);
-            glVertex2f(0, 0)
-            glTexCoord2f(1, 1);
-            glVertex2f(self.texture_width, 0)
-            glTexCoord2f(1, 0);
-            glVertex2f(self.texture_width, self.texture_height)
-            glTexCoord2f(0, 0);
-            glVertex2f(0, self.texture_height)
-            glEnd()
+            glEnableClientState(GL_VERTEX_ARRAY)
+            glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+            glBindBuffer(GL_ARRAY_BUFFER, self._quad_vbo)
+            glVertexPointer(2, GL_FLOAT, 16, ctypes.c_void_p(0))
+            glTexCoordPointer(2, GL_FLOAT, 16, ctypes.c_void_p(8))
+            glDrawArrays(GL_TRIANGLE_STRIP, 0, 4)
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+            glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+            glDisableClientState(GL_VERTEX_ARRAY)
             glBindTexture(GL_TEXTURE_2D, 0)
 
+            if self._program is not None:
+                glUseProgram(0)
+
+    def _update_quad(self, width: int, height: int):
+        """Записывает вершины квада размером width x height в VBO."""
+        vertices = np.array([[0, 0, 0, 1],
+                             [width, 0, 1, 1],
+                             [0, height, 0, 0],
+                             [width, height, 1, 0]], dtype=np.float32)
+        if self._quad_vbo is None:
+            self._quad_vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self._quad_vbo)
+        glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self._quad_size = (width, height)
+
+    def _is_offscreen(self) -> bool:
+        """Проверяет, лежит ли прямоугольник изображения целиком вне окна."""
+        x0, y0, x1, y1 = self.get_visible_viewport()
+        return x0 > x1 or y0 > y1
+
+    def get_visible_viewport(self) -> Tuple[float, float, float, float]:
+        """
+        Возвращает видимую часть изображения в его координатах.
+
+        Returns:
+            Кортеж (x0, y0, x1, y1); при x0 > x1 или y0 > y1 изображение
+            не попадает в окно
+        """
+        key = (self.zoom_factor, self.pan_x, self.pan_y,
+               self.width(), self.height(), self.texture_width, self.texture_height)
+        if key == self._viewport_cache_key:
+            return self._viewport_cache
+
+        inv_zoom = self._inv_zoom
+        # Обратное преобразование углов окна; при отрицательном масштабе
+        # края меняются местами
+        ax, bx = -self.pan_x * inv_zoom, (self.width() - self.pan_x) * inv_zoom
+        ay, by = -self.pan_y * inv_zoom, (self.height() - self.pan_y) * inv_zoom
+        viewport = (max(0.0, min(ax, bx)), max(0.0, min(ay, by)),
+                    min(float(self.texture_width), max(ax, bx)),
+                    min(float(self.texture_height), max(ay, by)))
+
+        self._viewport_cache_key = key
+        self._viewport_cache = viewport
+        return viewport
+
     def load_image(self, image_path: str):
         """Загружает изображение и создает текстуру."""
         try:
             # Загружаем изображение через PIL
-            pil_image = Image.open(image_path)
+            pil_image = _decode_image(image_path)
+        except Exception as e:
+            print(f"Ошибка загрузки изображения: {e}")
+            return False
 
-            # Конвертируем в RGB/RGBA
-            if pil_image.mode == 'L':  # Grayscale
-                pil_image = pil_image.convert('RGB')
-            elif pil_image.mode == 'P':  # Palette
-                pil_image = pil_image.convert('RGB')
-            elif pil_image.mode == '1':  # Binary
-                pil_image = pil_image.convert('RGB')
+        # Синхронная загрузка отменяет незавершенную фоновую
+        self._load_generation += 1
+        return self._set_image(pil_image)
+
+    def load_image_async(self, image_path: str):
+        """
+        Загружает изображение без блокировки интерфейса.
+
+        Файл декодируется в пуле потоков, текстура создается в потоке GUI.
+        По завершении испускается image_ready(успех).
+        """
+        self._load_generation += 1
+        self._preview_shown = False
+        task = ImageDecodeTask(image_path, self._load_generation)
+        task.signals.preview.connect(self._on_preview_decoded)
+        task.signals.decoded.connect(self._on_image_decoded)
+        task.signals.failed.connect(self._on_image_decode_failed)
+        self._decode_task = task
+        QThreadPool.globalInstance().start(task)
+
+    def _on_preview_decoded(self, generation: int, preview, full_size):
+        """Грубое превью готово: показываем его растянутым на полный размер (поток GUI)."""
+        if generation != self._load_generation:
+            return
+        if self._upload_image(preview, display_size=tuple(full_size)):
+            self._preview_shown = True
+            self.zoom_factor = 1.0
+            self.pan_x = 0.0
+            self.pan_y = 0.0
+            self.update()
 
-            # Применяем обработку изображения
-            pil_image = self._process_image(pil_image)
+    def _on_image_decoded(self, generation: int, pil_image):
+        """Изображение декодировано (поток GUI)."""
+        if generation != self._load_generation:
+            return
+        self._decode_task = None
+        # Если превью уже показано, вид пользователя не сбрасываем
+        self.image_ready.emit(self._set_image(pil_image, reset_view=not self._preview_shown))
+
+    def _on_image_decode_failed(self, generation: int, message: str):
+        """Ошибка фонового декодирования (поток GUI)."""
+        if generation != self._load_generation:
+            return
+        self._decode_task = None
+        print(f"Ошибка загрузки изображения: {message}")
+        self.image_ready.emit(False)
+
+    def _set_image(self, pil_image: Image.Image, reset_view: bool = True) -> bool:
+        """Обрабатывает декодированное изображение и создает из него текстуру."""
+        # Исходник хранится, чтобы reload_texture мог применить новые настройки
+        self._source_image = pil_image
+        # Гистограмма прежнего исходника больше не нужна
+        self._histogram_cache = (None, None)
+        if not self._upload_image():
+            return False
 
-            # Конвертируем в данные для текстуры
-            image_data = pil_image.tobytes("raw", "RGB", 0, -1)
-            width, height = pil_image.size
+        if reset_view:
+            # Сбрасываем трансформации
+            self.zoom_factor = 1.0
+            self.pan_x = 0.0
+            self.pan_y = 0.0
 
-            # Создаем текстуру OpenGL
-            self.makeCurrent()
+        self.update()
+        return True
+
+    def _upload_image(self, source: Optional[Image.Image] = None,
+                      display_size: Optional[Tuple[int, int]] = None) -> bool:
+        """
+        Ставит изображение в очередь загрузки в текстуру.
+
+        Сама загрузка выполняется в paintGL, где контекст уже текущий,
+        поэтому makeCurrent не вызывается. Незагруженная предыдущая
+        версия (например, превью) вытесняется из очереди.
+
+        Args:
+            source: Изображение (по умолчанию - исходное _source_image)
+            display_size: Размер на экране, если текстура меньше изображения (превью)
+        """
+        if source is None:
+            source = self._source_image
+        if source is None:
+            return False
+        self._upload_queue.append((source, display_size))
+        self.texture_width, self.texture_height = display_size or source.size
+        self.image_loaded = True
+        self.update()
+        return True
+
+    def _drain_uploads(self):
+        """Выполняет отложенные загрузки текстуры и таблицы (из paintGL)."""
+        while self._upload_queue:
+            source, display_size = self._upload_queue.popleft()
+            self._upload_now(source, display_size)
+        if self._lut_dirty and self._program is not None:
+            self._update_lut()
+        self._lut_dirty = False
+
+    def _upload_now(self, source: Image.Image,
+                    display_size: Optional[Tuple[int, int]] = None) -> bool:
+        """Обрабатывает изображение и загружает его в текстуру (контекст должен быть текущим)."""
+        try:
+            self._ensure_program()
+
+            # С шейдером в текстуру идет исходник, обработка - на GPU
+            if self._program is not None:
+                pil_image = source
+            else:
+                pil_image = self._process_image(source)
+
+            # Конвертируем в данные для текстуры; обработанное изображение
+            # больше не нужно - освобождаем его до копирования в PBO
+            raw_mode, *upload_format = _UPLOAD_FORMATS.get(pil_image.mode,
+                                                           _DEFAULT_UPLOAD_FORMAT)
+            image_data = pil_image.tobytes("raw", raw_mode, 0, -1)
+            width, height = pil_image.size
+            del pil_image
 
+            # Текстура создается один раз; при том же размере и формате ее
+            # хранилище переиспользуется через glTexSubImage2D
+            storage = (width, height, upload_format[0])
+            same_size = (self.image_texture is not None
+                         and storage == self._texture_storage_size)
             if self.image_texture is None:
                 self.image_texture = glGenTextures(1)
-
-            glBindTexture(GL_TEXTURE_2D, self.image_texture)
-
-            # Настройки текстуры
-            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
-            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
-            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
-            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+                glBindTexture(GL_TEXTURE_2D, self.image_texture)
+
+                # Настройки текстуры
+                glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+                glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+                # При уменьшении - трилинейная выборка из мип-уровней
+                min_filter = GL_LINEAR_MIPMAP_LINEAR if bool(glGenerateMipmap) else GL_LINEAR
+                glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, min_filter)
+                glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+            else:
+                glBindTexture(GL_TEXTURE_2D, self.image_texture)
 
             # Загружаем данные текстуры
-            glTexImage2D(GL_TEXTURE_2D, 0, GL_RGB, width, height, 0,
-                         GL_RGB, GL_UNSIGNED_BYTE, image_data)
-
-            self.texture_width = width
-            self.texture_height = height
+            self._upload_texture_data(image_data, width, height, upload_format,
+                                      reuse_storage=same_size)
+            self._texture_storage_size = storage
+            self._uploaded_key = (self._processing_key()
+                                  if source is self._source_image else None)
+            if self._program is not None:
+                self._update_lut(source)
+
+            self.texture_width, self.texture_height = display_size or (width, height)
+            if (self.texture_width, self.texture_height) != self._quad_size:
+                self._update_quad(self.texture_width, self.texture_height)
             self.image_loaded = True
+            return True
 
-            # Сбрасываем трансформации
-            self.zoom_factor = 1.0
-            self.pan_x = 0.0
-            self.pan_y = 0.0
+        except Exception as e:
+            print(f"Ошибка загрузки изображения: {e}")
+            return False
 
-            self.update()
+    def _upload_texture_data(self, image_data: bytes, width: int, height: int,
+                             upload_format: tuple, reuse_storage: bool = False):
+        """
+        Загружает пиксели в текущую привязанную текстуру через PBO.
+
+        Данные копируются в буфер драйвера, а glTexImage2D читает их из
+        PBO асинхронно, не дожидаясь передачи на GPU. Если отобразить
+        буфер не удалось, используется обычная синхронная загрузка.
+        При reuse_storage уже выделенная текстура того же размера
+        обновляется через glTexSubImage2D без перевыделения.
+
+        Args:
+            upload_format: (внутренний формат, формат данных, тип данных)
+        """
+        internal_format, data_format, data_type = upload_format
+        size = len(image_data)
+
+        if self._map_persistent(size):
+            # Буфер отображен постоянно: пишем сразу в память, видимую GPU,
+            # без map/unmap на каждую загрузку
+            ctypes.memmove(self._persistent_ptr, image_data, size)
+            pixels = None
+        else:
+            if self._pbo is None:
+                self._pbo = glGenBuffers(1)
+
+            glBindBuffer(GL_PIXEL_UNPACK_BUFFER, self._pbo)
+            # Перевыделение отвязывает старое хранилище - без ожидания GPU
+            glBufferData(GL_PIXEL_UNPACK_BUFFER, size, None, GL_STREAM_DRAW)
+            ptr = glMapBuffer(GL_PIXEL_UNPACK_BUFFER, GL_WRITE_ONLY)
+            if ptr:
+                ctypes.memmove(ptr, image_data, size)
+                glUnmapBuffer(GL_PIXEL_UNPACK_BUFFER)
+                pixels = None
+            else:
+                glBindBuffer(GL_PIXEL_UNPACK_BUFFER, 0)
+                pixels = image_data
+
+        # Строки RGB не выровнены по 4 байтам при ширине, не кратной 4
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        if reuse_storage:
+            glTexSubImage2D(GL_TEXTURE_2D, 0, 0, 0, width, height,
+                            data_format, data_type, pixels)
+        else:
+            glTexImage2D(GL_TEXTURE_2D, 0, internal_format, width, height, 0,
+                         data_format, data_type, pixels)
+        if bool(glGenerateMipmap):
+            # Цепочка мип-уровней строится на GPU один раз при загрузке:
+            # при отдалении пересэмплирование на CPU не требуется
+            glGenerateMipmap(GL_TEXTURE_2D)
+        if self._persistent_ptr is not None:
+            # Следующая запись в буфер дождется, пока GPU прочитает этот кадр
+            self._upload_fence = glFenceSync(GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+        glBindBuffer(GL_PIXEL_UNPACK_BUFFER, 0)
+
+    def _map_persistent(self, size: int) -> bool:
+        """
+        Готовит постоянно отображенный буфер распаковки не меньше size байт.
+
+        Буфер перевыделяется только при росте изображения. Перед записью
+        ожидается барьер предыдущей загрузки, чтобы не затереть данные,
+        которые GPU еще читает.
+
+        Returns:
+            True, если буфер привязан и в него можно писать
+        """
+        if self._persistent_supported is None:
+            self._persistent_supported = bool(glBufferStorage) and bool(glFenceSync)
+        if not self._persistent_supported:
+            return False
+
+        try:
+            if self._persistent_ptr is None or size > self._persistent_capacity:
+                if self._pbo is not None:
+                    glBindBuffer(GL_PIXEL_UNPACK_BUFFER, self._pbo)
+                    if self._persistent_ptr is not None:
+                        glUnmapBuffer(GL_PIXEL_UNPACK_BUFFER)
+                    glBindBuffer(GL_PIXEL_UNPACK_BUFFER, 0)
+                    glDeleteBuffers(1, [self._pbo])
+                self._persistent_ptr = None
+
+                flags = GL_MAP_WRITE_BIT | GL_MAP_PERSISTENT_BIT | GL_MAP_COHERENT_BIT
+                self._pbo = glGenBuffers(1)
+                glBindBuffer(GL_PIXEL_UNPACK_BUFFER, self._pbo)
+                glBufferStorage(GL_PIXEL_UNPACK_BUFFER, size, None, flags)
+                ptr = glMapBufferRange(GL_PIXEL_UNPACK_BUFFER, 0, size, flags)
+                if not ptr:
+                    raise RuntimeError("glMapBufferRange вернул пустой указатель")
+                self._persistent_ptr = ptr
+                self._persistent_capacity = size
+                self._upload_fence = None
+            else:
+                glBindBuffer(GL_PIXEL_UNPACK_BUFFER, self._pbo)
+
+            if self._upload_fence is not None:
+                glClientWaitSync(self._upload_fence, GL_SYNC_FLUSH_COMMANDS_BIT, 1_000_000_000)
+                glDeleteSync(self._upload_fence)
+                self._upload_fence = None
             return True
 
         except Exception as e:
-            print(f"Ошибка загрузки изображения: {e}")
+            print(f"Постоянное отображение буфера недоступно: {e}")
+            # Буфер, созданный до ошибки, освобождаем, а не просто забываем
+            if self._pbo is not None:
+                try:
+                    if self._persistent_ptr is not None:
+                        glBindBuffer(GL_PIXEL_UNPACK_BUFFER, self._pbo)
+                        glUnmapBuffer(GL_PIXEL_UNPACK_BUFFER)
+                    glBindBuffer(GL_PIXEL_UNPACK_BUFFER, 0)
+                    glDeleteBuffers(1, [self._pbo])
+                except Exception as e:
+                    print(f"Ошибка освобождения буфера распаковки: {e}")
+            glBindBuffer(GL_PIXEL_UNPACK_BUFFER, 0)
+            self._persistent_supported = False
+            self._persistent_ptr = None
+            self._persistent_capacity = 0
+            if self._upload_fence is not None:
+                glDeleteSync(self._upload_fence)
+                self._upload_fence = None
+            self._pbo = None
             return False
 
     def _process_image(self, pil_image: Image.Image) -> Image.Image:
-        """Обрабатывает изображение с применением настроек."""
-        image = pil_image.copy()
+        """
+        Обрабатывает изображение с применением настроек.
+
+        Для RGB и L яркость, контраст, гамма и инверсия сводятся в одну
+        таблицу из 256 значений (считается в NumPy) и применяются одним
+        проходом Image.point, без split/merge по каналам.
+        """
+        image = pil_image
+
+        if image.mode not in ('RGB', 'L'):
+            # Для прочих режимов гамма и инверсия не применяются
+            if self.brightness != 1.0:
+                image = ImageEnhance.Brightness(image).enhance(self.brightness)
+            if self.contrast != 1.0:
+                image = ImageEnhance.Contrast(image).enhance(self.contrast)
+        else:
+            lut = self._build_tone_lut(image)
+            if lut is not None:
+                image = image.point(lut.tolist() * len(image.getbands()))
 
-        # Яркость
+        # Пороговая обработка (бинаризация)
+        if self.threshold_enabled and self.threshold > 0:
+            # Таблица из 256 значений рассчитана на один канал: любой
+            # режим, кроме L (RGB, RGBA, ...), сначала переводится в L
+            if image.mode != 'L':
+                image = image.convert('L')
+            threshold_lut = np.where(np.arange(256) > self.threshold, 255, 0)
+            image = image.point(threshold_lut.tolist())
+
+        return image
+
+    def _build_tone_lut(self, image: Image.Image) -> Optional[np.ndarray]:
+        """
+        Строит таблицу тонового преобразования (яркость, контраст, гамма, инверсия).
+
+        Шаги повторяют ImageEnhance: каждый результат отсекается по [0, 255]
+        и усекается до целого. Возвращает None, если преобразование тождественно.
+        """
+        if (self.brightness == 1.0 and self.contrast == 1.0
+                and self.gamma == 1.0 and not self.invert_colors):
+            return None
+
+        lut = np.arange(256, dtype=np.float64)
+
+        # Яркость: смешивание с черным
         if self.brightness != 1.0:
-            enhancer = ImageEnhance.Brightness(image)
-            image = enhancer.enhance(self.brightness)
+            lut = np.clip(np.trunc(lut * self.brightness), 0, 255)
 
-        # Контраст
+        # Контраст: смешивание со средним уровнем серого после изменения яркости
         if self.contrast != 1.0:
-            enhancer = ImageEnhance.Contrast(image)
-            image = enhancer.enhance(self.contrast)
+            hist = self._luma_histogram(image)
+            total = hist.sum()
+            mean = int((hist @ lut) / total + 0.5) if total else 0
+            lut = np.clip(np.trunc(mean + (lut - mean) * self.contrast), 0, 255)
 
         # Гамма-коррекция
         if self.gamma != 1.0:
-            # Гамма-коррекция вручную
-            gamma_table = [int(255 * (i / 255) ** (1.0 / self.gamma))
-                           for i in range(256)]
-            if image.mode == 'RGB':
-                # Применяем таблицу к каждому каналу
-                r, g, b = image.split()
-                r = r.point(gamma_table)
-                g = g.point(gamma_table)
-                b = b.point(gamma_table)
-                image = Image.merge('RGB', (r, g, b))
-            elif image.mode == 'L':
-                image = image.point(gamma_table)
+            lut = np.floor(255 * (lut / 255) ** (1.0 / self.gamma))
 
         # Инверсия цветов
         if self.invert_colors:
-            if image.mode == 'RGB':
-                r, g, b = image.split()
-                r = Image.eval(r, lambda x: 255 - x)
-                g = Image.eval(g, lambda x: 255 - x)
-                b = Image.eval(b, lambda x: 255 - x)
-                image = Image.merge('RGB', (r, g, b))
-            elif image.mode == 'L':
-                image = Image.eval(image, lambda x: 255 - x)
+            lut = 255 - lut
 
-        # Пороговая обработка (бинаризация)
-        if self.threshold_enabled and self.threshold > 0:
-            if image.mode == 'RGB':
-                image = image.convert('L')
-            image = image.point(lambda x: 255 if x > self.threshold else 0)
-            image = image.convert('RGB')
+        return lut.astype(np.uint8)
 
-        return image
+    def _luma_histogram(self, image: Image.Image) -> np.ndarray:
+        """Гистограмма яркости изображения; для одного исходника считается один раз."""
+        # Храним сам объект изображения: id освобожденного превью может
+        # достаться другому изображению
+        cached_image, hist = self._histogram_cache
+        if cached_image is not image or hist is None:
+            hist = np.asarray(image.convert('L').histogram(), dtype=np.float64)
+            self._histogram_cache = (image, hist)
+        return hist
 
     def zoom_in(self, factor: float = 1.25):
         """Увеличивает масштаб."""
@@ -197,46 +758,89 @@ class RasterManager(QGLWidget):
 
     def pan(self, dx: float, dy: float):
         """Панорамирует изображение."""
-        self.pan_x += dx / self.zoom_factor
-        self.pan_y += dy / self.zoom_factor
+        self.pan_x += dx * self._inv_zoom
+        self.pan_y += dy * self._inv_zoom
         self.update()
 
     def set_brightness(self, value: float):
         """Устанавливает яркость."""
         self.brightness = max(0.1, min(5.0, value))
         if self.image_loaded:
-            self.reload_texture()
+            self._reload_timer.start()
 
     def set_contrast(self, value: float):
         """Устанавливает контраст."""
         self.contrast = max(0.1, min(5.0, value))
         if self.image_loaded:
-            self.reload_texture()
+            self._reload_timer.start()
 
     def set_gamma(self, value: float):
         """Устанавливает гамму."""
         self.gamma = max(0.1, min(5.0, value))
         if self.image_loaded:
-            self.reload_texture()
+            self._reload_timer.start()
 
     def set_invert_colors(self, invert: bool):
         """Включает/выключает инверсию цветов."""
         self.invert_colors = invert
         if self.image_loaded:
-            self.reload_texture()
+            self._reload_timer.start()
 
     def set_threshold(self, threshold: int, enabled: bool = True):
         """Устанавливает порог бинаризации."""
         self.threshold = max(0, min(255, threshold))
         self.threshold_enabled = enabled
         if self.image_loaded:
-            self.reload_texture()
+            self._reload_timer.start()
+
+    def set_enhancement(self, brightness: Optional[float] = None,
+                        contrast: Optional[float] = None,
+                        gamma: Optional[float] = None,
+                        invert: Optional[bool] = None,
+                        threshold: Optional[int] = None,
+                        threshold_enabled: Optional[bool] = None):
+        """
+        Устанавливает несколько параметров обработки за один раз.
+
+        В отличие от отдельных set_*, текстура перезагружается один раз.
+        Параметры со значением None не изменяются.
+        """
+        if brightness is not None:
+            self.brightness = max(0.1, min(5.0, brightness))
+        if contrast is not None:
+            self.contrast = max(0.1, min(5.0, contrast))
+        if gamma is not None:
+            self.gamma = max(0.1, min(5.0, gamma))
+        if invert is not None:
+            self.invert_colors = invert
+        if threshold is not None:
+            self.threshold = max(0, min(255, threshold))
+        if threshold_enabled is not None:
+            self.threshold_enabled = threshold_enabled
+        if self.image_loaded:
+            self._reload_timer.start()
 
     def reload_texture(self):
         """Перезагружает текстуру с текущими настройками обработки."""
         # Этот метод нужно вызывать, когда меняются настройки обработки
-        # Для простоты перерисовываем текущую текстуру
-        self.update()
+        self._reload_timer.stop()
+        if self._source_image is None:
+            return
+        # Настройки не изменились - текстура уже актуальна, копировать нечего
+        if self._uploaded_key == self._processing_key():
+            return
+        if self._program is not None and not self._upload_queue:
+            # Текстура хранит исходник - достаточно обновить таблицу
+            self._lut_dirty = True
+            self._uploaded_key = self._processing_key()
+            self.update()
+        else:
+            self._upload_image()
+
+    def _processing_key(self) -> tuple:
+        """Ключ текущего исходника и настроек обработки."""
+        return (id(self._source_image), self.brightness, self.contrast, self.gamma,
+                self.invert_colors, self.threshold, self.threshold_enabled)
 
     def wheelEvent(self, event):
         """Обработка колесика мыши для масштабирования."""
@@ -247,17 +851,15 @@ class RasterManager(QGLWidget):
 
     def mouseMoveEvent(self, event):
         """Обработка движения мыши для панорамирования."""
+        pos = event.localPos()
         if event.buttons() & Qt.LeftButton:
-            dx = event.x() - self.last_mouse_x
-            dy = event.y() - self.last_mouse_y
-            self.pan(dx, -dy)  # Инвертируем dy для естественного поведения
-        self.last_mouse_x = event.x()
-        self.last_mouse_y = event.y()
+            delta = pos - self.last_mouse_pos
+            self.pan(delta.x(), -delta.y())  # Инвертируем dy для естественного поведения
+        self.last_mouse_pos = pos
 
     def mousePressEvent(self, event):
         """Обработка нажатия кнопки мыши."""
-        self.last_mouse_x = event.x()
-        self.last_mouse_y = event.y()
+        self.last_mouse_pos = event.localPos()
 
     def get_pixel_color(self, x: int, y: int) -> Tuple[int, int, int]:
         """Возвращает цвет пикселя в координатах изображения."""
@@ -265,8 +867,8 @@ class RasterManager(QGLWidget):
             return (0, 0, 0)
 
         # Преобразуем координаты виджета в координаты текстуры
-        tex_x = int((x - self.pan_x) / self.zoom_factor)
-        tex_y = int((self.texture_height - (y - self.pan_y) / self.zoom_factor))
+        tex_x = int((x - self.pan_x) * self._inv_zoom)
+        tex_y = int((self.texture_height - (y - self.pan_y) * self._inv_zoom))
 
         # Читаем пиксель из текстуры (требует FBO для корректной работы)
         # Это упрощенная версия - в реальности нужно использовать FBO
@@ -101,12 +101,14 @@ class TraceManager:
         trace_min_x, trace_max_x = min(x0, x1), max(x0, x1)
         trace_min_y, trace_max_y = min(y0, y1), max(y0, y1)
 
-        for point in interval.points:
-            if not (trace_min_x <= point.x_px <= trace_max_x and
-                    trace_min_y <= point.y_px <= trace_max_y):
-                return False
-
-        return True
+        # Одна векторная проверка всех точек вместо сравнений в цикле
+        xs = np.fromiter((p.x_px for p in interval.points), dtype=np.float64,
+                         count=len(interval.points))
+        ys = np.fromiter((p.y_px for p in interval.points), dtype=np.float64,
+                         count=len(interval.points))
+        inside = ((xs >= trace_min_x) & (xs <= trace_max_x) &
+                  (ys >= trace_min_y) & (ys <= trace_max_y))
+        return bool(inside.all())
 
     def merge_intervals(self, trace: SeismicTrace,
                         interval_ids: List[str]) -> Optional[DigitizationInterval]:
@@ -279,28 +281,32 @@ class TraceManager:
         Returns:
             List[SeismicTrace]: Список обнаруженных трасс
         """
-        if not self.project or not self.project.raster or not self.project.raster.pil_image:
+        if not self.project or not self.project.raster:
             return []
 
-        # Получаем размеры изображения
-        width, height = self.project.raster.pil_image.size
+        # Размер берем из метаданных, если изображение не загружено целиком
+        raster = self.project.raster
+        if raster.pil_image is not None:
+            width, height = raster.pil_image.size
+        elif 'size' in raster.metadata:
+            width, height = raster.metadata['size']
+        else:
+            return []
 
         # Вычисляем отступы
         margin_x = int(width * margin)
         margin_y = int(height * margin)
 
-        # Вычисляем ширину каждой трассы
-        trace_width = (width - 2 * margin_x) / num_traces
+        # Границы полос всех трасс одним вызовом
+        bounds = np.linspace(margin_x, width - margin_x, num_traces + 1)
+        sampling_rate = self.project.settings.export_sampling_rate
 
         traces = []
         for i in range(num_traces):
-            x0 = margin_x + i * trace_width
-            x1 = margin_x + (i + 1) * trace_width
-
             trace = self.create_trace(
                 name=f"Автотрасса_{i + 1}",
-                raster_coords=(x0, margin_y, x1, height - margin_y),
-                sampling_rate=self.project.settings.export_sampling_rate
+                raster_coords=(float(bounds[i]), margin_y, float(bounds[i + 1]), height - margin_y),
+                sampling_rate=sampling_rate
             )
             traces.append(trace)
 
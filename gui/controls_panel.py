@@ -3,6 +3,30 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QPushButton,
                              QComboBox, QLabel, QGroupBox, QSpinBox,
                              QFrame, QHBoxLayout)
 from PyQt5.QtCore import pyqtSignal
+from functools import partial
+
+# Стили кнопок режимов: одна таблица стилей на всю панель разбирается один раз,
+# кнопки выбираются по objectName
+_PANEL_STYLE = """
+    QPushButton#panModeButton, QPushButton#digitizeModeButton {
+        color: white;
+        font-weight: bold;
+        padding: 8px;
+        border-radius: 5px;
+    }
+    QPushButton#panModeButton {
+        background-color: #4CAF50;
+    }
+    QPushButton#panModeButton:hover {
+        background-color: #45a049;
+    }
+    QPushButton#digitizeModeButton {
+        background-color: #2196F3;
+    }
+    QPushButton#digitizeModeButton:hover {
+        background-color: #0b7dda;
+    }
+"""
 
 
 class ControlsPanel(QWidget):
@@ -23,25 +47,15 @@ class ControlsPanel(QWidget):
 
     def setup_ui(self):
         layout = QVBoxLayout()
+        self.setStyleSheet(_PANEL_STYLE)
 
         # ===== РЕЖИМ "ПАНОРАМИРОВАНИЕ" =====
         pan_group = QGroupBox("Навигация")
         pan_layout = QVBoxLayout()
 
         self.pan_mode_btn = QPushButton("🔍 Режим панорамирования")
-        self.pan_mode_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #4CAF50;
-                color: white;
-                font-weight: bold;
-                padding: 8px;
-                border-radius: 5px;
-            }
-            QPushButton:hover {
-                background-color: #45a049;
-            }
-        """)
-        self.pan_mode_btn.clicked.connect(lambda: self.mode_changed.emit('pan'))
+        self.pan_mode_btn.setObjectName("panModeButton")
+        self.pan_mode_btn.clicked.connect(partial(self.mode_changed.emit, 'pan'))
         pan_layout.addWidget(self.pan_mode_btn)
 
         pan_group.setLayout(pan_layout)
@@ -58,33 +72,22 @@ class ControlsPanel(QWidget):
         digitize_layout = QVBoxLayout()
 
         self.digitize_mode_btn = QPushButton("✏️ Режим оцифровки")
-        self.digitize_mode_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #2196F3;
-                color: white;
-                font-weight: bold;
-                padding: 8px;
-                border-radius: 5px;
-            }
-            QPushButton:hover {
-                background-color: #0b7dda;
-            }
-        """)
-        self.digitize_mode_btn.clicked.connect(lambda: self.mode_changed.emit('digitize'))
+        self.digitize_mode_btn.setObjectName("digitizeModeButton")
+        self.digitize_mode_btn.clicked.connect(partial(self.mode_changed.emit, 'digitize'))
         digitize_layout.addWidget(self.digitize_mode_btn)
 
         digitize_layout.addWidget(QLabel("Инструменты оцифровки"))
 
         self.add_point_btn = QPushButton("Добавить точку")
-        self.add_point_btn.clicked.connect(lambda: self.mode_changed.emit('add_point'))
+        self.add_point_btn.clicked.connect(partial(self.mode_changed.emit, 'add_point'))
         digitize_layout.addWidget(self.add_point_btn)
 
         self.delete_point_btn = QPushButton("Удалить точку")
-        self.delete_point_btn.clicked.connect(lambda: self.mode_changed.emit('delete_point'))
+        self.delete_point_btn.clicked.connect(partial(self.mode_changed.emit, 'delete_point'))
         digitize_layout.addWidget(self.delete_point_btn)
 
         self.move_point_btn = QPushButton("Переместить точку")
-        self.move_point_btn.clicked.connect(lambda: self.mode_changed.emit('move_point'))
+        self.move_point_btn.clicked.connect(partial(self.mode_changed.emit, 'move_point'))
         digitize_layout.addWidget(self.move_point_btn)
 
         self.finish_interval_btn = QPushButton("Завершить текущую линию")
@@ -1,9 +1,10 @@
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
                              QLineEdit, QPushButton, QComboBox, QSpinBox,
                              QDoubleSpinBox, QGroupBox, QFormLayout, QCheckBox,
-                             QTreeWidget, QTreeWidgetItem, QTabWidget, QWidget,
+                             QTreeView, QAbstractItemView, QTabWidget, QWidget,
                              QFileDialog, QMessageBox)
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import (Qt, QAbstractItemModel, QModelIndex, QObject, QRunnable,
+                          QThreadPool, pyqtSignal)
 import numpy as np
 import os
 
@@ -16,16 +17,295 @@ except ImportError:
     SCIPY_AVAILABLE = False
     print("Предупреждение: scipy не установлен. Интерполяция будет недоступна.")
 
+# Подписи типов интервалов для колонки "Тип"
+_INTERVAL_TYPE_NAMES = {
+    "time_marker": "Метка времени",
+    "waveform": "Волновая форма",
+    "noise": "Помеха",
+}
+
+
+def get_interval_type_name(interval) -> str:
+    """Подпись типа интервала."""
+    interval_type = "noise" if interval.is_noise else "waveform"
+    return _INTERVAL_TYPE_NAMES.get(interval_type, "Неизвестно")
+
+
+class _TraceEntry:
+    """Строка трассы в модели экспорта."""
+    __slots__ = ('row', 'trace', 'intervals', 'total_points', 'fetched')
+
+    def __init__(self, row, trace, intervals, total_points):
+        self.row = row
+        self.trace = trace
+        # Только интервалы с точками
+        self.intervals = intervals
+        self.total_points = total_points
+        # Сколько интервалов уже отдано виду (дочерние строки подгружаются при раскрытии)
+        self.fetched = 0
+
+
+class _LoaderSignals(QObject):
+    batch_ready = pyqtSignal(int, list)  # Номер загрузки, пакет строк трасс
+    finished = pyqtSignal(int)
+
+
+class ProjectItemLoader(QRunnable):
+    """Собирает строки дерева экспорта в фоновом потоке и отдаёт их пакетами.
+
+    В поток попадают только обычные кортежи; элементы модели создаются в потоке GUI.
+    """
+
+    BATCH_SIZE = 200
+
+    def __init__(self, traces, generation):
+        super().__init__()
+        self.traces = list(traces)
+        self.generation = generation
+        self.signals = _LoaderSignals()
+
+    def run(self):
+        batch = []
+        for trace in self.traces:
+            intervals = [i for i in trace.intervals if i.points]
+            batch.append((trace, intervals, sum(len(i.points) for i in intervals)))
+            if len(batch) >= self.BATCH_SIZE:
+                self.signals.batch_ready.emit(self.generation, batch)
+                batch = []
+        if batch:
+            self.signals.batch_ready.emit(self.generation, batch)
+        self.signals.finished.emit(self.generation)
+
+
+class ExportProjectModel(QAbstractItemModel):
+    """Модель дерева трасса -> интервалы для выбора данных экспорта.
+
+    Строки читаются прямо из трасс проекта, виджеты на элементы не создаются.
+    У индексов интервалов internalPointer указывает на строку родительской трассы.
+    """
+
+    HEADERS = ["Элемент", "Тип", "Точек", "Интервалов"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._entries = []
+        self._flat_items = []
+        # Ключ элемента ('trace', id) / ('interval', id) -> Qt.CheckState
+        self._check_states = {}
+
+    def clear(self):
+        """Очищает модель и состояния отметок."""
+        self.beginResetModel()
+        self._entries = []
+        self._flat_items = []
+        self._check_states = {}
+        self.endResetModel()
+
+    def append_traces(self, rows):
+        """Добавляет пакет строк (трасса, интервалы с точками, число точек) одной вставкой."""
+        if not rows:
+            return
+        first = len(self._entries)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        for row, (trace, intervals, total_points) in enumerate(rows, first):
+            self._entries.append(_TraceEntry(row, trace, intervals, total_points))
+
+            # Плоский список (ключ, данные) в порядке дерева для выборки отмеченных
+            self._flat_items.append((('trace', trace.id), ("trace", trace.id, trace.name)))
+            self._flat_items.extend(
+                (('interval', interval.id), ("interval", trace.id, interval.id, trace.name))
+                for interval in intervals
+            )
+        self.endInsertRows()
+
+    def interval_count(self):
+        """Общее число интервалов с точками."""
+        return sum(len(entry.intervals) for entry in self._entries)
+
+    def _resolve(self, index):
+        """Возвращает (строка трассы, интервал или None) для индекса."""
+        entry = index.internalPointer()
+        if entry is None:
+            return self._entries[index.row()], None
+        return entry, entry.intervals[index.row()]
+
+    @staticmethod
+    def _key(entry, interval):
+        if interval is None:
+            return ('trace', entry.trace.id)
+        return ('interval', interval.id)
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        if not parent.isValid():
+            return self.createIndex(row, column)
+        return self.createIndex(row, column, self._entries[parent.row()])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        entry = index.internalPointer()
+        if entry is None:
+            return QModelIndex()
+        return self.createIndex(entry.row, 0)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self._entries)
+        if parent.internalPointer() is None and parent.column() == 0:
+            return self._entries[parent.row()].fetched
+        return 0
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return bool(self._entries)
+        if parent.internalPointer() is None and parent.column() == 0:
+            return bool(self._entries[parent.row()].intervals)
+        return False
+
+    def canFetchMore(self, parent):
+        if not parent.isValid() or parent.internalPointer() is not None:
+            return False
+        entry = self._entries[parent.row()]
+        return entry.fetched < len(entry.intervals)
+
+    def fetchMore(self, parent):
+        """Добавляет строки интервалов трассы при первом раскрытии."""
+        if not self.canFetchMore(parent):
+            return
+        entry = self._entries[parent.row()]
+        self.beginInsertRows(parent, entry.fetched, len(entry.intervals) - 1)
+        entry.fetched = len(entry.intervals)
+        self.endInsertRows()
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() == 0:
+            flags |= Qt.ItemIsUserCheckable
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        entry, interval = self._resolve(index)
+        column = index.column()
+
+        if role == Qt.DisplayRole:
+            if interval is None:
+                if column == 0:
+                    return entry.trace.name
+                if column == 1:
+                    return "Трасса"
+                if column == 2:
+                    return str(entry.total_points)
+                return str(len(entry.intervals))
+            if column == 0:
+                return f"Интервал {interval.id[:8]}"
+            if column == 1:
+                return get_interval_type_name(interval)
+            if column == 2:
+                return str(len(interval.points))
+            return "1"
+
+        if column != 0:
+            return None
+
+        if role == Qt.CheckStateRole:
+            return self._check_states.get(self._key(entry, interval), Qt.Unchecked)
+
+        if role == Qt.UserRole:
+            trace = entry.trace
+            if interval is None:
+                return ("trace", trace.id, trace.name)
+            return ("interval", trace.id, interval.id, trace.name)
+
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.CheckStateRole or index.column() != 0:
+            return False
+
+        state = Qt.CheckState(value)
+        entry, interval = self._resolve(index)
+        if interval is None:
+            # Состояние трассы переносится на её интервалы
+            self._set_trace_state(entry, state)
+        else:
+            self._check_states[self._key(entry, interval)] = state
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        if interval is None:
+            self._emit_children_changed(entry)
+        return True
+
+    def _set_trace_state(self, entry, state):
+        """Ставит состояние трассе и всем её интервалам без отправки сигналов."""
+        states = self._check_states
+        states[('trace', entry.trace.id)] = state
+        for interval in entry.intervals:
+            states[('interval', interval.id)] = state
+
+    def _emit_children_changed(self, entry):
+        """Одно уведомление на весь диапазон интервалов трассы."""
+        if entry.fetched:
+            parent = self.createIndex(entry.row, 0)
+            self.dataChanged.emit(self.index(0, 0, parent),
+                                  self.index(entry.fetched - 1, 0, parent),
+                                  [Qt.CheckStateRole])
+
+    def set_all_check_states(self, state):
+        """Ставит состояние всем элементам за один проход."""
+        if not self._entries:
+            return
+        state = Qt.CheckState(state)
+        for entry in self._entries:
+            self._set_trace_state(entry, state)
+
+        # Уведомления - по одному на уровень, а не на каждый элемент
+        self.dataChanged.emit(self.index(0, 0), self.index(len(self._entries) - 1, 0),
+                              [Qt.CheckStateRole])
+        for entry in self._entries:
+            self._emit_children_changed(entry)
+
+    def checked_items(self):
+        """Данные отмеченных элементов в порядке дерева."""
+        states = self._check_states
+        return [data for key, data in self._flat_items if states.get(key) == Qt.Checked]
+
 
 class ExportDialog(QDialog):
     """Диалог экспорта данных в различные форматы."""
 
+    # До скольких интервалов дерево раскрывается целиком при открытии
+    EXPAND_ALL_LIMIT = 500
+
     def __init__(self, parent=None, format_type='SAC'):
         super().__init__(parent)
         self.main_window = parent
         self.format_type = format_type
-        self.selected_items = []
+        # Выбор и настройки, с которыми выполнен последний экспорт
+        self._last_selected = []
+        self._last_settings = None
+        # Последний собранный словарь настроек экспорта; сбрасывается при изменении виджетов
+        self._settings_cache = None
+        # Номер текущей фоновой загрузки дерева и сам загрузчик
+        self._load_generation = 0
+        self._loader = None
+        # (проект, время изменения), для которых построено дерево
+        self._loaded_key = None
         self.init_ui()
+        self._connect_settings_invalidation()
 
     def init_ui(self):
         self.setWindowTitle(f"Экспорт данных - {self.format_type}")
@@ -73,13 +353,16 @@ class ExportDialog(QDialog):
         layout = QVBoxLayout(self.selection_tab)
 
         # Дерево элементов для выбора
-        self.selection_tree = QTreeWidget()
-        self.selection_tree.setHeaderLabels(["Элемент", "Тип", "Точек", "Интервалов"])
-        self.selection_tree.setSelectionMode(QTreeWidget.MultiSelection)
-        self.selection_tree.itemChanged.connect(self.on_item_changed)
-        self.selection_tree.itemClicked.connect(self.on_item_clicked)
-
-        layout.addWidget(QLabel("Выберите элементы для экспорта:"))
+        self.project_model = ExportProjectModel(self)
+        self.selection_tree = QTreeView()
+        self.selection_tree.setModel(self.project_model)
+        # Все строки одной высоты - вид не опрашивает sizeHint каждой строки
+        self.selection_tree.setUniformRowHeights(True)
+        self.selection_tree.setSelectionMode(QAbstractItemView.MultiSelection)
+        self.selection_tree.clicked.connect(self.on_item_clicked)
+
+        self.selection_label = QLabel("Выберите элементы для экспорта:")
+        layout.addWidget(self.selection_label)
         layout.addWidget(self.selection_tree)
 
         # Кнопки выбора
@@ -203,58 +486,64 @@ class ExportDialog(QDialog):
         layout.addWidget(self.preview_text)
 
     def load_project_items(self):
-        """Загружает элементы проекта в дерево выбора."""
-        self.selection_tree.clear()
-
-        if not self.main_window or not self.main_window.current_project:
+        """Загружает элементы проекта в дерево выбора (в фоновом потоке, пакетами)."""
+        project = self.main_window.current_project if self.main_window else None
+        self._loaded_key = self._project_key(project)
+
+        # Результаты предыдущей, ещё не завершённой загрузки будут отброшены
+        self._load_generation += 1
+        self.project_model.clear()
+        if not project or not project.traces:
             return
 
-        project = self.main_window.current_project
-
-        # Добавляем трассы
-        for trace in project.traces:
-            # Подсчитываем только интервалы с точками
-            intervals_with_points = [i for i in trace.intervals if i.points]
-            total_points = sum(len(i.points) for i in trace.intervals if i.points)
-
-            trace_item = QTreeWidgetItem(self.selection_tree)
-            trace_item.setText(0, trace.name)
-            trace_item.setText(1, "Трасса")
-            trace_item.setText(2, str(total_points))
-            trace_item.setText(3, str(len(intervals_with_points)))  # Только интервалы с точками
-            trace_item.setData(0, Qt.UserRole, ("trace", trace.id, trace.name))
-            trace_item.setCheckState(0, Qt.Unchecked)
-
-            # Добавляем ТОЛЬКО интервалы с точками
-            for interval in intervals_with_points:  # Используем отфильтрованный список
-                if not interval.points:  # Дополнительная проверка
-                    continue
-
-                interval_item = QTreeWidgetItem(trace_item)
-                interval_item.setText(0, f"Интервал {interval.id[:8]}")
-                interval_item.setText(1, "Волновая форма")
-                interval_item.setText(2, str(len(interval.points)))
-                interval_item.setText(3, "1")
-                interval_item.setData(0, Qt.UserRole, ("interval", trace.id, interval.id, trace.name))
-                interval_item.setCheckState(0, Qt.Unchecked)
-
-        self.selection_tree.expandAll()
-
-    def on_item_changed(self, item, column):
-        """Обработка изменения состояния элемента."""
-        if column != 0:
+        self.selection_label.setText("Загрузка элементов проекта...")
+        loader = ProjectItemLoader(project.traces, self._load_generation)
+        loader.signals.batch_ready.connect(self._on_items_batch)
+        loader.signals.finished.connect(self._on_items_loaded)
+        self._loader = loader
+        QThreadPool.globalInstance().start(loader)
+
+    def _on_items_batch(self, generation, rows):
+        """Добавляет пакет строк от загрузчика (поток GUI)."""
+        if generation == self._load_generation:
+            self.project_model.append_traces(rows)
+
+    def _on_items_loaded(self, generation):
+        """Завершение загрузки: раскрываем дерево, если оно небольшое."""
+        if generation != self._load_generation:
             return
+        self._loader = None
+        self.selection_label.setText("Выберите элементы для экспорта:")
 
-        # Обновляем состояние дочерних элементов
-        if item.childCount() > 0:
-            state = item.checkState(0)
-            for i in range(item.childCount()):
-                child = item.child(i)
-                child.setCheckState(0, state)
-
-    def on_item_clicked(self, item, column):
+        # Раскрытие - без промежуточных перерисовок
+        tree = self.selection_tree
+        tree.setUpdatesEnabled(False)
+        tree.setSortingEnabled(False)
+        try:
+            # Большое дерево оставляем свёрнутым: интервалы подгрузятся при раскрытии трассы
+            if self.project_model.interval_count() <= self.EXPAND_ALL_LIMIT:
+                tree.expandAll()
+        finally:
+            tree.setUpdatesEnabled(True)
+
+    @staticmethod
+    def _project_key(project):
+        """Версия проекта: любое изменение проходит через mark_dirty() и увеличивает version."""
+        return (id(project), project.version) if project else None
+
+    def refresh(self):
+        """Обновляет дерево и предпросмотр при повторном открытии; настройки сохраняются."""
+        # Проект не менялся - дерево и отметки остаются как есть
+        project = self.main_window.current_project if self.main_window else None
+        if self._project_key(project) != self._loaded_key:
+            self.load_project_items()
+        self.preview_label.setText("Выберите элемент для предпросмотра")
+        self.preview_text.clear()
+        self.tab_widget.setCurrentIndex(0)
+
+    def on_item_clicked(self, index):
         """Показывает предпросмотр выбранного элемента"""
-        data = item.data(0, Qt.UserRole)
+        data = index.sibling(index.row(), 0).data(Qt.UserRole)
         if not data:
             return
 
@@ -315,11 +604,7 @@ class ExportDialog(QDialog):
         if not trace:
             return
 
-        interval = None
-        for inv in trace.intervals:
-            if inv.id == interval_id:
-                interval = inv
-                break
+        interval = trace.get_interval(interval_id)
 
         if not interval or not interval.points:
             self.preview_text.setText("Нет данных для предпросмотра")
@@ -360,43 +645,46 @@ class ExportDialog(QDialog):
 
     def set_all_checkstates(self, state):
         """Устанавливает состояние для всех элементов."""
-        root = self.selection_tree.invisibleRootItem()
-        for i in range(root.childCount()):
-            item = root.child(i)
-            item.setCheckState(0, state)
+        self.project_model.set_all_check_states(state)
 
     def get_selected_items(self):
         """Возвращает список выбранных элементов с данными."""
-        selected = []
-        root = self.selection_tree.invisibleRootItem()
+        return self.project_model.checked_items()
+
+    def _connect_settings_invalidation(self):
+        """Подключает сигналы изменения виджетов к сбросу кэша настроек."""
+        for widget in (self.sampling_rate_spin, self.time_start_spin, self.detrend_order_spin):
+            widget.valueChanged.connect(self._invalidate_settings_cache)
+        for combo in (self.units_combo, self.normalize_combo):
+            combo.currentIndexChanged.connect(self._invalidate_settings_cache)
+        self.custom_units_edit.textChanged.connect(self._invalidate_settings_cache)
+        for checkbox in (self.raw_points_cb, self.remove_trend_cb, self.normalize_cb):
+            checkbox.toggled.connect(self._invalidate_settings_cache)
 
-        def collect_items(item):
-            if item.checkState(0) == Qt.Checked:
-                data = item.data(0, Qt.UserRole)
-                if data:
-                    selected.append(data)
-
-            for i in range(item.childCount()):
-                collect_items(item.child(i))
-
-        for i in range(root.childCount()):
-            collect_items(root.child(i))
+        if self.format_type == 'SAC':
+            self.sac_little_endian_cb.toggled.connect(self._invalidate_settings_cache)
+        elif self.format_type == 'MiniSEED':
+            self.mseed_encoding_combo.currentIndexChanged.connect(self._invalidate_settings_cache)
 
-        return selected
+    def _invalidate_settings_cache(self, *args):
+        self._settings_cache = None
 
     def get_export_settings(self):
         """Возвращает настройки экспорта."""
+        if self._settings_cache is not None:
+            return dict(self._settings_cache)
+
+        units = self.units_combo.currentText()
         settings = {
             'sampling_rate': self.sampling_rate_spin.value(),
             'time_start': self.time_start_spin.value(),
-            'units': self.custom_units_edit.text() if self.units_combo.currentText() == 'custom'
-            else self.units_combo.currentText(),
+            'units': self.custom_units_edit.text() if units == 'custom' else units,
             'remove_trend': self.remove_trend_cb.isChecked(),
             'detrend_order': self.detrend_order_spin.value(),
             'normalize': self.normalize_cb.isChecked(),
             'normalize_method': self.normalize_combo.currentText(),
             'format': self.format_type,
-            'raw_points_only': self.raw_points_cb.isChecked() if hasattr(self, 'raw_points_cb') else False
+            'raw_points_only': self.raw_points_cb.isChecked()
         }
 
         if self.format_type == 'SAC':
@@ -404,7 +692,8 @@ class ExportDialog(QDialog):
         elif self.format_type == 'MiniSEED':
             settings['encoding'] = self.mseed_encoding_combo.currentText()
 
-        return settings
+        self._settings_cache = settings
+        return dict(settings)
 
     def extract_points_data(self, selected_items, settings):
         """Извлекает данные точек из выбранных элементов"""
@@ -436,16 +725,14 @@ class ExportDialog(QDialog):
                 trace_name = item[3]
                 trace = project.get_trace(trace_id)
 
-                if trace:
-                    for interval in trace.intervals:
-                        if interval.id == interval_id:
-                            if raw_only:
-                                data = self.extract_interval_data_simple(interval, trace_name, settings)
-                            else:
-                                data = self.extract_interval_data(interval, trace_name, settings)
-                            if data:
-                                all_data.append(data)
-                            break
+                interval = trace.get_interval(interval_id) if trace else None
+                if interval:
+                    if raw_only:
+                        data = self.extract_interval_data_simple(interval, trace_name, settings)
+                    else:
+                        data = self.extract_interval_data(interval, trace_name, settings)
+                    if data:
+                        all_data.append(data)
 
         return all_data
 
@@ -609,8 +896,13 @@ class ExportDialog(QDialog):
             writer.writerow(['#'])
             writer.writerow(['Time (s)', 'Amplitude'])
 
-            for t, a in zip(data['time'], amplitude):
-                writer.writerow([f"{t:.6f}", f"{a:.6f}"])
+            # Форматируем все строки разом и пишем одним вызовом
+            if len(amplitude):
+                time_str = np.char.mod('%.6f', np.asarray(data['time'], dtype=np.float64))
+                amp_str = np.char.mod('%.6f', amplitude)
+                rows = np.char.add(np.char.add(time_str, ','), amp_str)
+                csvfile.write(writer.dialect.lineterminator.join(rows.tolist()))
+                csvfile.write(writer.dialect.lineterminator)
 
     def export_to_sac(self, data, filepath):
         """Экспорт в SAC формат (упрощенный)"""
@@ -649,6 +941,14 @@ class ExportDialog(QDialog):
                  units=data['units'],
                  raw_points=data['raw_points'])
 
+    def selected_items(self):
+        """Элементы, выбранные при последнем экспорте."""
+        return self._last_selected
+
+    def export_settings(self):
+        """Настройки последнего экспорта."""
+        return self._last_settings
+
     def do_export(self):
         """Выполняет экспорт выбранных данных."""
         selected = self.get_selected_items()
@@ -658,6 +958,10 @@ class ExportDialog(QDialog):
 
         settings = self.get_export_settings()
 
+        # Сохраняем состояние формы на момент экспорта - вызывающему не нужно обходить дерево заново
+        self._last_selected = selected
+        self._last_settings = settings
+
         # Извлекаем данные
         all_data = self.extract_points_data(selected, settings)
 
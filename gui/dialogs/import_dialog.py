@@ -1,5 +1,13 @@
 from PyQt5.QtWidgets import *
 
+# Подпись в списке -> цветовой режим PIL
+_COLOR_MODES = {
+    "Градации серого": "L",
+    "RGB": "RGB",
+    "Авто": "auto"  # Будет определен автоматически
+}
+
+
 class ImportRasterDialog(QDialog):
     """Диалог импорта растрового изображения."""
 
@@ -42,7 +50,7 @@ class ImportRasterDialog(QDialog):
 
         # Цветовой режим
         self.color_combo = QComboBox()
-        self.color_combo.addItems(["Градации серого", "RGB", "Авто"])
+        self.color_combo.addItems(list(_COLOR_MODES))
         form_layout.addRow("Цветовой режим:", self.color_combo)
 
         settings_group.setLayout(form_layout)
@@ -74,14 +82,8 @@ class ImportRasterDialog(QDialog):
 
     def get_parameters(self):
         """Возвращает параметры импорта."""
-        color_mode_map = {
-            "Градации серого": "L",
-            "RGB": "RGB",
-            "Авто": "auto"  # Будет определен автоматически
-        }
-
         return {
             'filepath': self.filepath,
             'dpi': (self.dpi_spin.value(), self.dpi_spin.value()),  # Одинаковое по X и Y
-            'color_mode': color_mode_map.get(self.color_combo.currentText(), "auto")
+            'color_mode': _COLOR_MODES.get(self.color_combo.currentText(), "auto")
         }
\ No newline at end of file
@@ -1,10 +1,10 @@
 # Диалог настроек растра
 
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
-                             QPushButton, QDoubleSpinBox, QGroupBox,
+                             QPushButton, QSpinBox, QDoubleSpinBox, QGroupBox,
                              QFormLayout, QCheckBox, QComboBox, QTabWidget,
                              QWidget, QSlider)
-from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 
 
 class RasterSettingsDialog(QDialog):
@@ -15,8 +15,22 @@ class RasterSettingsDialog(QDialog):
     def __init__(self, parent=None, initial_settings=None):
         super().__init__(parent)
         self.initial_settings = initial_settings or {}
+        # Последний собранный словарь настроек; сбрасывается при изменении любого виджета
+        self._settings_cache = None
         self.init_ui()
         self.load_initial_settings()
+        self._connect_settings_invalidation()
+
+        # Живой предпросмотр: серия изменений ползунков сливается в один сигнал за 30 мс
+        self._emit_timer = QTimer(self)
+        self._emit_timer.setSingleShot(True)
+        self._emit_timer.setInterval(30)
+        self._emit_timer.timeout.connect(self.apply_settings)
+        for widget in (self.brightness_slider, self.contrast_slider,
+                       self.gamma_spin, self.threshold_spin):
+            widget.valueChanged.connect(self._schedule_apply)
+        # Последние принятые настройки - к ним диалог возвращается по "Отмена"
+        self.initial_settings = self.get_settings()
 
     def init_ui(self):
         self.setWindowTitle("Настройки растра")
@@ -185,20 +199,18 @@ class RasterSettingsDialog(QDialog):
         interp_group = QGroupBox("Настройки интерполяции")
         interp_layout = QFormLayout()
 
-        self.poly_order_spin = QDoubleSpinBox()
+        self.poly_order_spin = QSpinBox()
         self.poly_order_spin.setRange(1, 10)
         self.poly_order_spin.setValue(3)
-        self.poly_order_spin.setDecimals(0)
         interp_layout.addRow("Порядок полинома:", self.poly_order_spin)
 
         self.interp_method_combo = QComboBox()
         self.interp_method_combo.addItems(["Кубический сплайн", "Полиномиальная"])
         interp_layout.addRow("Метод интерполяции:", self.interp_method_combo)
 
-        self.num_samples_spin = QDoubleSpinBox()
+        self.num_samples_spin = QSpinBox()
         self.num_samples_spin.setRange(10, 10000)
         self.num_samples_spin.setValue(100)
-        self.num_samples_spin.setDecimals(0)
         interp_layout.addRow("Количество точек:", self.num_samples_spin)
 
         self.auto_interpolate_cb = QCheckBox("Автоматическая интерполяция")
@@ -231,12 +243,50 @@ class RasterSettingsDialog(QDialog):
 
     def load_initial_settings(self):
         """Загружает начальные настройки."""
-        if self.initial_settings:
-            # Загружаем настройки из словаря
-            pass  # Можно реализовать при необходимости
+        settings = self.initial_settings
+        if not settings:
+            return
+
+        self.orientation_combo.setCurrentIndex(settings.get('orientation', self.orientation_combo.currentIndex()))
+        self.time_start_spin.setValue(settings.get('time_start', self.time_start_spin.value()))
+        self.time_end_spin.setValue(settings.get('time_end', self.time_end_spin.value()))
+        self.sampling_rate_spin.setValue(settings.get('sampling_rate', self.sampling_rate_spin.value()))
+        if 'brightness' in settings:
+            self.brightness_slider.setValue(int(round(settings['brightness'] * 100)))
+        if 'contrast' in settings:
+            self.contrast_slider.setValue(int(round(settings['contrast'] * 100)))
+        self.gamma_spin.setValue(settings.get('gamma', self.gamma_spin.value()))
+        self.invert_cb.setChecked(settings.get('invert_colors', self.invert_cb.isChecked()))
+        self.threshold_cb.setChecked(settings.get('threshold_enabled', self.threshold_cb.isChecked()))
+        self.threshold_spin.setValue(settings.get('threshold', self.threshold_spin.value()))
+        self.poly_order_spin.setValue(int(settings.get('poly_order', self.poly_order_spin.value())))
+        self.interp_method_combo.setCurrentIndex(settings.get('interp_method', self.interp_method_combo.currentIndex()))
+        self.num_samples_spin.setValue(int(settings.get('num_samples', self.num_samples_spin.value())))
+        self.auto_interpolate_cb.setChecked(settings.get('auto_interpolate', self.auto_interpolate_cb.isChecked()))
+        self.show_grid_cb.setChecked(settings.get('show_grid', self.show_grid_cb.isChecked()))
+        self.show_points_cb.setChecked(settings.get('show_points', self.show_points_cb.isChecked()))
+        self.show_interpolated_cb.setChecked(settings.get('show_interpolated', self.show_interpolated_cb.isChecked()))
+
+    def _connect_settings_invalidation(self):
+        """Подключает сигналы изменения виджетов к сбросу кэша настроек."""
+        for combo in (self.orientation_combo, self.interp_method_combo):
+            combo.currentIndexChanged.connect(self._invalidate_settings_cache)
+        for widget in (self.time_start_spin, self.time_end_spin, self.sampling_rate_spin,
+                       self.brightness_slider, self.contrast_slider, self.gamma_spin,
+                       self.threshold_spin, self.poly_order_spin, self.num_samples_spin):
+            widget.valueChanged.connect(self._invalidate_settings_cache)
+        for checkbox in (self.invert_cb, self.threshold_cb, self.auto_interpolate_cb,
+                         self.show_grid_cb, self.show_points_cb, self.show_interpolated_cb):
+            checkbox.toggled.connect(self._invalidate_settings_cache)
+
+    def _invalidate_settings_cache(self, *args):
+        self._settings_cache = None
 
     def get_settings(self):
         """Возвращает текущие настройки."""
+        if self._settings_cache is not None:
+            return dict(self._settings_cache)
+
         settings = {
             'orientation': self.orientation_combo.currentIndex(),
             'time_start': self.time_start_spin.value(),
@@ -248,22 +298,34 @@ class RasterSettingsDialog(QDialog):
             'invert_colors': self.invert_cb.isChecked(),
             'threshold_enabled': self.threshold_cb.isChecked(),
             'threshold': self.threshold_spin.value(),
-            'poly_order': int(self.poly_order_spin.value()),
+            'poly_order': self.poly_order_spin.value(),
             'interp_method': self.interp_method_combo.currentIndex(),
-            'num_samples': int(self.num_samples_spin.value()),
+            'num_samples': self.num_samples_spin.value(),
             'auto_interpolate': self.auto_interpolate_cb.isChecked(),
             'show_grid': self.show_grid_cb.isChecked(),
             'show_points': self.show_points_cb.isChecked(),
             'show_interpolated': self.show_interpolated_cb.isChecked()
         }
-        return settings
+        self._settings_cache = settings
+        return dict(settings)
+
+    def _schedule_apply(self, *args):
+        """Перезапускает таймер отложенной отправки настроек."""
+        self._emit_timer.start()
 
     def apply_settings(self):
         """Применяет настройки."""
+        self._emit_timer.stop()
         settings = self.get_settings()
         self.settings_changed.emit(settings)
 
     def accept_and_apply(self):
         """Применяет настройки и закрывает диалог."""
         self.apply_settings()
-        self.accept()
\ No newline at end of file
+        self.initial_settings = self.get_settings()
+        self.accept()
+
+    def reject(self):
+        """Отмена: диалог переиспользуется, поэтому возвращаем виджеты к принятым настройкам."""
+        self.load_initial_settings()
+        super().reject()
\ No newline at end of file
@@ -1,11 +1,131 @@
-from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTableWidget,
-                             QTableWidgetItem, QPushButton, QHeaderView,
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTableView,
+                             QAbstractItemView, QPushButton, QHeaderView,
                              QMessageBox, QWidget, QLabel, QFrame)
-from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
 from PyQt5.QtGui import QColor, QBrush
 import uuid
 
 
+class TraceTableModel(QAbstractTableModel):
+    """Модель таблицы трасс проекта.
+
+    Значения ячеек читаются из трасс проекта при отрисовке,
+    элементы таблицы на каждую ячейку не создаются.
+    """
+
+    HEADERS = ["Название", "ID", "Интервалы", "Точки"]
+    # Строк за одну догрузку: вид запрашивает следующие при прокрутке к концу
+    FETCH_BATCH = 256
+
+    def __init__(self, project=None, parent=None):
+        super().__init__(parent)
+        self.project = project
+        self._fetched = 0
+
+    def _total(self):
+        return len(self.project.traces) if self.project else 0
+
+    def reload(self):
+        """Перечитывает список трасс проекта одним сбросом модели."""
+        self.beginResetModel()
+        self._fetched = min(self.FETCH_BATCH, self._total())
+        self.endResetModel()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._fetched < self._total()
+
+    def fetchMore(self, parent=QModelIndex()):
+        """Добавляет в вид следующую порцию строк."""
+        if not self.canFetchMore(parent):
+            return
+        count = min(self.FETCH_BATCH, self._total() - self._fetched)
+        self.beginInsertRows(QModelIndex(), self._fetched, self._fetched + count - 1)
+        self._fetched += count
+        self.endInsertRows()
+
+    def append_trace(self, trace):
+        """Добавляет трассу в проект и одну строку в конец таблицы.
+
+        Returns:
+            Номер строки новой трассы
+        """
+        # Догружаем оставшиеся строки, чтобы новая трасса сразу была видна
+        if self._fetched < self._total():
+            count = self._total() - self._fetched
+            self.beginInsertRows(QModelIndex(), self._fetched, self._fetched + count - 1)
+            self._fetched += count
+            self.endInsertRows()
+        row = self._total()
+        self.beginInsertRows(QModelIndex(), row, row)
+        try:
+            self.project.add_trace(trace)
+            self._fetched += 1
+        finally:
+            self.endInsertRows()
+        return row
+
+    def remove_row(self, row):
+        """Удаляет трассу строки row из проекта и одну строку из таблицы."""
+        trace = self.project.traces[row]
+        self.beginRemoveRows(QModelIndex(), row, row)
+        try:
+            self.project.remove_trace(trace.id)
+            self._fetched -= 1
+        finally:
+            self.endRemoveRows()
+
+    def row_changed(self, row):
+        """Сообщает виду об изменении данных строки row."""
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.HEADERS) - 1))
+
+    def trace_at(self, row):
+        """Трасса в строке row."""
+        return self.project.traces[row]
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._fetched
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        trace = self.project.traces[index.row()]
+        column = index.column()
+
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return trace.name
+            if column == 1:
+                return trace.id[:8] + "..." if len(trace.id) > 8 else trace.id
+            if column == 2:
+                # Количество интервалов с точками
+                return str(sum(1 for i in trace.intervals if i.points))
+            if column == 3:
+                # Количество точек
+                return str(sum(len(i.points) for i in trace.intervals if i.points))
+        elif role == Qt.ToolTipRole and column == 1:
+            return trace.id
+        elif role == Qt.TextAlignmentRole and column >= 2:
+            return Qt.AlignCenter
+        elif role == Qt.UserRole:
+            return trace.id
+        return None
+
+
 class TraceManagerDialog(QDialog):
     """Диалог управления трассами"""
 
@@ -30,21 +150,32 @@ class TraceManagerDialog(QDialog):
         layout.addWidget(info_label)
 
         # Таблица трасс
-        self.table = QTableWidget()
-        self.table.setColumnCount(4)
-        self.table.setHorizontalHeaderLabels(["Название", "ID", "Интервалы", "Точки"])
+        self.model = TraceTableModel(self.project, self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
 
         # Настройка таблицы
+        # Ширины колонок задаются заранее по шрифту: ResizeToContents
+        # перемеряет содержимое строк при каждом изменении модели
         header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.Fixed)
         header.setSectionResizeMode(0, QHeaderView.Stretch)
-        header.setSectionResizeMode(1, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(3, QHeaderView.ResizeToContents)
-
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SingleSelection)
+        fm = self.fontMetrics()
+        header.resizeSection(1, fm.horizontalAdvance("00000000...") + 24)
+        header.resizeSection(2, fm.horizontalAdvance("Интервалы") + 24)
+        header.resizeSection(3, fm.horizontalAdvance("0000000") + 24)
+        self.table.setSortingEnabled(False)
+
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
         self.table.setAlternatingRowColors(True)
 
+        # Все строки одной высоты: вид не пересчитывает высоту каждой строки
+        vertical_header = self.table.verticalHeader()
+        vertical_header.setSectionResizeMode(QHeaderView.Fixed)
+        vertical_header.setDefaultSectionSize(self.fontMetrics().height() + 8)
+        self.table.setWordWrap(False)
+
         layout.addWidget(self.table)
 
         # Разделитель
@@ -91,50 +222,13 @@ class TraceManagerDialog(QDialog):
 
     def load_traces(self):
         """Загрузить список трасс в таблицу"""
-        self.table.setRowCount(0)
-
-        if not self.project or not self.project.traces:
-            return
-
-        for row, trace in enumerate(self.project.traces):
-            self.table.insertRow(row)
-
-            # Название трассы
-            name_item = QTableWidgetItem(trace.name)
-            name_item.setFlags(name_item.flags() & ~Qt.ItemIsEditable)
-            self.table.setItem(row, 0, name_item)
-
-            # ID трассы
-            short_id = trace.id[:8] + "..." if len(trace.id) > 8 else trace.id
-            id_item = QTableWidgetItem(short_id)
-            id_item.setToolTip(trace.id)
-            id_item.setFlags(id_item.flags() & ~Qt.ItemIsEditable)
-            self.table.setItem(row, 1, id_item)
-
-            # Количество интервалов
-            intervals_with_points = [i for i in trace.intervals if i.points]
-            intervals_count = len(intervals_with_points)
-            intervals_item = QTableWidgetItem(str(intervals_count))
-            intervals_item.setTextAlignment(Qt.AlignCenter)
-            intervals_item.setFlags(intervals_item.flags() & ~Qt.ItemIsEditable)
-            self.table.setItem(row, 2, intervals_item)
-
-            # Количество точек
-            total_points = sum(len(i.points) for i in trace.intervals if i.points)
-            points_item = QTableWidgetItem(str(total_points))
-            points_item.setTextAlignment(Qt.AlignCenter)
-            points_item.setFlags(points_item.flags() & ~Qt.ItemIsEditable)
-            self.table.setItem(row, 3, points_item)
-
-            # Сохраняем ссылку на трассу
-            self.table.item(row, 0).setData(Qt.UserRole, trace.id)
+        self.model.reload()
 
     def get_selected_trace(self):
         """Получить выбранную трассу"""
-        current_row = self.table.currentRow()
+        current_row = self.table.currentIndex().row()
         if current_row >= 0:
-            trace_id = self.table.item(current_row, 0).data(Qt.UserRole)
-            return self.project.get_trace(trace_id)
+            return self.model.trace_at(current_row)
         return None
 
     def add_trace(self):
@@ -152,8 +246,9 @@ class TraceManagerDialog(QDialog):
                 is_visible=True,
                 is_editing=False
             )
-            self.project.add_trace(trace)
-            self.load_traces()
+            row = self.model.append_trace(trace)
+            self.table.selectRow(row)
+            self.table.scrollTo(self.model.index(row, 0))
             QMessageBox.information(self, "Успех", f"Трасса '{name}' добавлена")
 
     def edit_trace(self):
@@ -169,7 +264,8 @@ class TraceManagerDialog(QDialog):
                                         text=trace.name)
         if ok and name:
             trace.name = name
-            self.load_traces()
+            self.project.mark_dirty()
+            self.model.row_changed(self.table.currentIndex().row())
             QMessageBox.information(self, "Успех", f"Трасса переименована в '{name}'")
 
     def delete_trace(self):
@@ -197,18 +293,17 @@ class TraceManagerDialog(QDialog):
                 interval.points.clear()
             trace.intervals.clear()
 
-            self.project.remove_trace(trace_id)
+            self.model.remove_row(self.table.currentIndex().row())
 
+            # Диалог открывается только из главного окна, у которого всегда есть холст
             parent = self.parent()
-            if parent and hasattr(parent, 'canvas'):
+            if parent is not None:
                 canvas = parent.canvas
                 if canvas.current_trace and canvas.current_trace.id == trace_id:
                     canvas.current_trace = None
                     canvas.current_interval = None
                     canvas.update_display()
 
-            self.load_traces()
-
             import gc
             gc.collect()
 
@@ -1,10 +1,90 @@
-from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTableWidget,
-                             QTableWidgetItem, QPushButton, QHeaderView,
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTableView,
+                             QAbstractItemView, QPushButton, QHeaderView,
                              QWidget, QLabel, QFrame)
-from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
 from PyQt5.QtGui import QColor, QBrush
 
 
+class VisibilityTableModel(QAbstractTableModel):
+    """Модель таблицы видимости трасс.
+
+    Флажки и подписи читаются из трасс проекта; список перестраивается
+    одним сбросом модели, а не вставкой элементов по одному.
+    """
+
+    HEADERS = ["Видимость", "Название трассы", "Информация"]
+
+    # Пользователь переключил видимость трассы
+    visibility_toggled = pyqtSignal()
+
+    def __init__(self, project=None, parent=None):
+        super().__init__(parent)
+        self.project = project
+
+    def reload(self):
+        """Перечитывает список трасс одним сбросом модели."""
+        self.beginResetModel()
+        self.endResetModel()
+
+    def set_all_visible(self, visible):
+        """Показывает или скрывает все трассы одним уведомлением вида."""
+        if not self.project or not self.project.traces:
+            return
+        for trace in self.project.traces:
+            trace.is_visible = visible
+        last = len(self.project.traces) - 1
+        self.dataChanged.emit(self.index(0, 0), self.index(last, 0), [Qt.CheckStateRole])
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or not self.project:
+            return 0
+        return len(self.project.traces)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if index.column() == 0:
+            return Qt.ItemIsUserCheckable | Qt.ItemIsEnabled
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        trace = self.project.traces[index.row()]
+        column = index.column()
+
+        if column == 0:
+            if role == Qt.CheckStateRole:
+                return Qt.Checked if trace.is_visible else Qt.Unchecked
+        elif column == 1:
+            if role == Qt.DisplayRole:
+                return trace.name
+        elif role == Qt.DisplayRole:
+            # Подсчет только интервалов с точками
+            intervals_count = sum(1 for interval in trace.intervals if interval.points)
+            total_points = sum(len(interval.points) for interval in trace.intervals)
+            return f"Точек: {total_points}, Интервалов: {intervals_count}"
+        elif role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or index.column() != 0 or role != Qt.CheckStateRole:
+            return False
+        self.project.traces[index.row()].is_visible = (value == Qt.Checked)
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        self.visibility_toggled.emit()
+        return True
+
+
 class VisibilityDialog(QDialog):
     """Диалог управления видимостью трасс"""
 
@@ -20,7 +100,7 @@ class VisibilityDialog(QDialog):
         self.load_traces()
 
         # Подключаем сигнал изменения чекбоксов
-        self.table.itemChanged.connect(self.on_checkbox_changed)
+        self.model.visibility_toggled.connect(self.visibility_changed)
 
     def setup_ui(self):
         """Настройка интерфейса"""
@@ -31,18 +111,29 @@ class VisibilityDialog(QDialog):
         layout.addWidget(info_label)
 
         # Таблица трасс
-        self.table = QTableWidget()
-        self.table.setColumnCount(3)
-        self.table.setHorizontalHeaderLabels(["Видимость", "Название трассы", "Информация"])
+        self.model = VisibilityTableModel(self.project, self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
 
+        # Ширины колонок задаются заранее по шрифту: ResizeToContents
+        # перемеряет содержимое строк при каждом изменении модели
         header = self.table.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(QHeaderView.Fixed)
         header.setSectionResizeMode(1, QHeaderView.Stretch)
-        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
+        fm = self.fontMetrics()
+        header.resizeSection(0, fm.horizontalAdvance("Видимость") + 24)
+        header.resizeSection(2, fm.horizontalAdvance("Точек: 000000, Интервалов: 0000") + 24)
+        self.table.setSortingEnabled(False)
 
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.table.setAlternatingRowColors(True)
 
+        # Все строки одной высоты: вид не пересчитывает высоту каждой строки
+        vertical_header = self.table.verticalHeader()
+        vertical_header.setSectionResizeMode(QHeaderView.Fixed)
+        vertical_header.setDefaultSectionSize(self.fontMetrics().height() + 8)
+        self.table.setWordWrap(False)
+
         layout.addWidget(self.table)
 
         line = QFrame()
@@ -73,85 +164,16 @@ class VisibilityDialog(QDialog):
 
     def load_traces(self):
         """Загрузить список трасс в таблицу"""
-        self.table.setRowCount(0)
-
-        if not self.project or not self.project.traces:
-            return
-
-        # Блокируем сигналы во время загрузки
-        self.table.blockSignals(True)
-
-        for row, trace in enumerate(self.project.traces):
-            self.table.insertRow(row)
-
-            # Чекбокс видимости
-            checkbox_item = QTableWidgetItem()
-            checkbox_item.setFlags(Qt.ItemIsUserCheckable | Qt.ItemIsEnabled)
-            checkbox_item.setCheckState(Qt.Checked if trace.is_visible else Qt.Unchecked)
-            self.table.setItem(row, 0, checkbox_item)
-
-            # Название трассы
-            name_item = QTableWidgetItem(trace.name)
-            name_item.setFlags(name_item.flags() & ~Qt.ItemIsEditable)
-            self.table.setItem(row, 1, name_item)
-
-            # Подсчет только интервалов с точками
-            intervals_with_points = [interval for interval in trace.intervals if interval.points]
-            total_points = sum(len(interval.points) for interval in trace.intervals if interval.points)
-
-            info_text = f"Точек: {total_points}, Интервалов: {len(intervals_with_points)}"
-            info_item = QTableWidgetItem(info_text)
-            info_item.setFlags(info_item.flags() & ~Qt.ItemIsEditable)
-            info_item.setTextAlignment(Qt.AlignCenter)
-            self.table.setItem(row, 2, info_item)
-
-            # Сохраняем ID трассы
-            self.table.item(row, 1).setData(Qt.UserRole, trace.id)
-
-        self.table.blockSignals(False)
-
-    def on_checkbox_changed(self, item):
-        """Обработка изменения чекбокса"""
-        if item.column() != 0:  # Только для колонки с чекбоксом
-            return
-
-        row = item.row()
-        trace_id = self.table.item(row, 1).data(Qt.UserRole)
-        trace = self.project.get_trace(trace_id)
-
-        if trace:
-            new_state = (item.checkState() == Qt.Checked)
-            trace.is_visible = new_state
-            self.visibility_changed.emit()
+        self.model.reload()
 
     def show_all(self):
         """Показать все трассы"""
-        self.table.blockSignals(True)
-
-        for row in range(self.table.rowCount()):
-            item = self.table.item(row, 0)
-            item.setCheckState(Qt.Checked)
-            trace_id = self.table.item(row, 1).data(Qt.UserRole)
-            trace = self.project.get_trace(trace_id)
-            if trace:
-                trace.is_visible = True
-
-        self.table.blockSignals(False)
+        self.model.set_all_visible(True)
         self.visibility_changed.emit()
 
     def hide_all(self):
         """Скрыть все трассы"""
-        self.table.blockSignals(True)
-
-        for row in range(self.table.rowCount()):
-            item = self.table.item(row, 0)
-            item.setCheckState(Qt.Unchecked)
-            trace_id = self.table.item(row, 1).data(Qt.UserRole)
-            trace = self.project.get_trace(trace_id)
-            if trace:
-                trace.is_visible = False
-
-        self.table.blockSignals(False)
+        self.model.set_all_visible(False)
         self.visibility_changed.emit()
 
     def closeEvent(self, event):
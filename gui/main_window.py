@@ -1,17 +1,95 @@
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QToolBar, QAction, QStatusBar, QFileDialog,
-                             QInputDialog, QMessageBox, QLabel)
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QKeySequence
+                             QInputDialog, QMessageBox, QLabel, QProgressDialog)
+from PyQt5.QtCore import Qt, QThread, QTimer, QSettings, pyqtSignal
+from PyQt5.QtGui import QKeySequence, QIcon
+from functools import partial
 from pathlib import Path
 
 from models.project import Project
 from models.workspace_params import WorkspaceSettings
-from core.digitizer_engine import DigitizerEngine
 from gui.raster_canvas import RasterCanvas
 from gui.controls_panel import ControlsPanel
 
 
+# Классы диалогов импортируются при первом открытии и кэшируются
+_DIALOG_MODULES = {
+    'ExportDialog': 'gui.dialogs.export_dialog',
+    'RasterSettingsDialog': 'gui.dialogs.raster_settings_dialog',
+    'TraceManagerDialog': 'gui.dialogs.trace_manager_dialog',
+    'VisibilityDialog': 'gui.dialogs.visibility_dialog',
+}
+_DIALOG_CLS_CACHE = {}
+
+# Иконки темы: один QIcon на имя, общий для всех действий
+_ICON_CACHE = {}
+
+
+def _theme_icon(name: str) -> QIcon:
+    """Возвращает иконку из темы оформления, кэшируя ее по имени"""
+    icon = _ICON_CACHE.get(name)
+    if icon is None:
+        icon = QIcon.fromTheme(name)
+        _ICON_CACHE[name] = icon
+    return icon
+
+
+def _dialog_class(name: str):
+    """Возвращает класс диалога, импортируя его модуль только один раз"""
+    cls = _DIALOG_CLS_CACHE.get(name)
+    if cls is None:
+        import importlib
+        module = importlib.import_module(_DIALOG_MODULES[name])
+        cls = getattr(module, name)
+        _DIALOG_CLS_CACHE[name] = cls
+    return cls
+
+
+class RasterLoadWorker(QThread):
+    """Фоновое декодирование растра, чтобы не блокировать интерфейс"""
+
+    progress = pyqtSignal(int)
+    finished_ok = pyqtSignal(object, object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, filepath, parent=None):
+        super().__init__(parent)
+        self.filepath = filepath
+
+    def run(self):
+        try:
+            from utils.file_io import read_raster_array
+
+            self.progress.emit(10)
+            raster_data = read_raster_array(self.filepath)
+            self.progress.emit(100)
+
+            self.finished_ok.emit(raster_data, Path(self.filepath))
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
+class ProjectLoadWorker(QThread):
+    """Фоновая загрузка файла проекта (распаковка и декодирование растра)"""
+
+    finished_ok = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, filepath, parent=None):
+        super().__init__(parent)
+        self.filepath = filepath
+
+    def run(self):
+        try:
+            self.finished_ok.emit(Project.load(Path(self.filepath)))
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
+# Сколько путей хранить в списке недавних проектов
+MAX_RECENT_FILES = 10
+
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -21,10 +99,121 @@ class MainWindow(QMainWindow):
         self.current_project = None
         self.workspace_settings = WorkspaceSettings()
 
+        # Диалоги создаются один раз и переиспользуются при повторном открытии
+        # Ключ: ('export', формат) или ('raster_settings', None)
+        self._dialog_pool = {}
+
+        # Фоновая загрузка растра
+        self._raster_worker = None
+        self._raster_progress = None
+        self._project_worker = None
+        self._project_progress = None
+
+        # Геометрия окна записывается в настройки с задержкой после
+        # перемещения/изменения размера, а не на каждое событие
+        self._geom_dirty = False
+        self._geom_timer = QTimer(self)
+        self._geom_timer.setSingleShot(True)
+        self._geom_timer.setInterval(500)
+        self._geom_timer.timeout.connect(self._write_geometry)
+
+        # Последняя папка, недавние проекты и геометрия окна сохраняются между запусками
+        self.load_settings()
+
+        # Сводка по проекту в строке состояния пересчитывается не чаще
+        # одного раза за серию изменений
+        self._update_pending = False
+        self._update_timer = QTimer(self)
+        self._update_timer.setSingleShot(True)
+        self._update_timer.setInterval(50)
+        self._update_timer.timeout.connect(self._do_update_project_info)
+        # Ключ состояния проекта, для которого сводка уже посчитана
+        self._last_stats_key = None
+
         self.setup_ui()
         self.setup_menu()
         self.setup_statusbar()
 
+    def load_settings(self):
+        """Прочитать сохраненные настройки окна"""
+        self._settings = QSettings("SeismogramsDigitizer", "Digitizer")
+        self._last_dir = self._settings.value("last_dir", "", type=str)
+        recent = self._settings.value("recent_files", [])
+        # QSettings возвращает строку вместо списка из одного элемента
+        if isinstance(recent, str):
+            recent = [recent] if recent else []
+        self._recent_files = list(recent)[:MAX_RECENT_FILES]
+
+        geometry = self._settings.value("geometry")
+        if geometry is not None:
+            self.restoreGeometry(geometry)
+        # restoreGeometry вызывает moveEvent/resizeEvent - записывать нечего
+        self._geom_dirty = False
+        self._geom_timer.stop()
+
+    def save_settings(self):
+        """Сохранить настройки окна"""
+        self._settings.setValue("last_dir", self._last_dir)
+        self._settings.setValue("recent_files", self._recent_files)
+        self._write_geometry()
+        self._settings.sync()
+
+    def _mark_geometry_dirty(self):
+        """Запланировать запись геометрии окна"""
+        self._geom_dirty = True
+        self._geom_timer.start()
+
+    def _write_geometry(self):
+        """Записать геометрию окна, если она менялась"""
+        if self._geom_dirty:
+            self._geom_dirty = False
+            self._geom_timer.stop()
+            self._settings.setValue("geometry", self.saveGeometry())
+
+    def moveEvent(self, event):
+        self._mark_geometry_dirty()
+        super().moveEvent(event)
+
+    def resizeEvent(self, event):
+        self._mark_geometry_dirty()
+        super().resizeEvent(event)
+
+    def _remember_path(self, filepath, recent: bool = False):
+        """Запомнить папку файла и, при необходимости, добавить его в недавние"""
+        filepath = str(filepath)
+        self._last_dir = str(Path(filepath).parent)
+        if recent:
+            if filepath in self._recent_files:
+                self._recent_files.remove(filepath)
+            self._recent_files.insert(0, filepath)
+            del self._recent_files[MAX_RECENT_FILES:]
+
+    def maybe_save(self) -> bool:
+        """Предложить сохранить изменения; False - пользователь отменил действие"""
+        project = self.current_project
+        if project is None or not project.dirty:
+            return True
+
+        reply = QMessageBox.question(
+            self,
+            "Несохраненные изменения",
+            f"Проект '{project.name}' изменен.\nСохранить изменения?",
+            QMessageBox.Save | QMessageBox.Discard | QMessageBox.Cancel
+        )
+        if reply == QMessageBox.Save:
+            self.save_project()
+            # Пользователь мог отменить выбор файла в "Сохранить как"
+            return not project.dirty
+        return reply == QMessageBox.Discard
+
+    def closeEvent(self, event):
+        """Сохранение настроек при закрытии окна"""
+        if not self.maybe_save():
+            event.ignore()
+            return
+        self.save_settings()
+        super().closeEvent(event)
+
     def setup_ui(self):
         """Настройка пользовательского интерфейса"""
         central_widget = QWidget()
@@ -34,6 +223,7 @@ class MainWindow(QMainWindow):
 
         # Холст для отображения растра
         self.canvas = RasterCanvas()
+        self.canvas.data_changed.connect(self.on_canvas_data_changed)
         layout.addWidget(self.canvas, stretch=3)
 
         # Панель управления
@@ -51,6 +241,16 @@ class MainWindow(QMainWindow):
 
         layout.addWidget(self.controls_panel, stretch=1)
 
+    def _create_action(self, text, slot, shortcut=None, icon_name=None):
+        """Создать действие меню с необязательными сочетанием клавиш и иконкой"""
+        action = QAction(text, self)
+        if shortcut is not None:
+            action.setShortcut(shortcut)
+        if icon_name:
+            action.setIcon(_theme_icon(icon_name))
+        action.triggered.connect(slot)
+        return action
+
     def setup_menu(self):
         """Настройка меню"""
         menubar = self.menuBar()
@@ -58,99 +258,135 @@ class MainWindow(QMainWindow):
         # Меню File
         file_menu = menubar.addMenu("Файл")
 
-        new_action = QAction("Новый проект", self)
-        new_action.setShortcut(QKeySequence.New)
-        new_action.triggered.connect(self.new_project)
-        file_menu.addAction(new_action)
+        file_menu.addAction(self._create_action(
+            "Новый проект", self.new_project, QKeySequence.New, "document-new"))
+        file_menu.addAction(self._create_action(
+            "Открыть проект...", self.open_project, QKeySequence.Open, "document-open"))
+        # Недавние проекты: список строится при каждом открытии подменю
+        self.recent_menu = file_menu.addMenu("Открыть недавний")
+        self.recent_menu.aboutToShow.connect(self._populate_recent_menu)
 
-        open_action = QAction("Открыть проект...", self)
-        open_action.setShortcut(QKeySequence.Open)
-        open_action.triggered.connect(self.open_project)
-        file_menu.addAction(open_action)
-
-        save_action = QAction("Сохранить проект", self)
-        save_action.setShortcut(QKeySequence.Save)
-        save_action.triggered.connect(self.save_project)
-        file_menu.addAction(save_action)
-
-        save_as_action = QAction("Сохранить как...", self)
-        save_as_action.setShortcut(QKeySequence.SaveAs)
-        save_as_action.triggered.connect(self.save_project_as)
-        file_menu.addAction(save_as_action)
+        file_menu.addAction(self._create_action(
+            "Сохранить проект", self.save_project, QKeySequence.Save, "document-save"))
+        file_menu.addAction(self._create_action(
+            "Сохранить как...", self.save_project_as, QKeySequence.SaveAs, "document-save-as"))
 
         file_menu.addSeparator()
 
-        import_raster_action = QAction("Импортировать растр...", self)
-        import_raster_action.triggered.connect(self.import_raster)
-        file_menu.addAction(import_raster_action)
+        file_menu.addAction(self._create_action(
+            "Импортировать растр...", self.import_raster, icon_name="document-import"))
 
         file_menu.addSeparator()
 
-        # Подменю экспорта
-        export_menu = file_menu.addMenu("Экспорт")
-
-        export_csv_action = QAction("CSV формат...", self)
-        export_csv_action.triggered.connect(lambda: self.show_export_dialog("CSV"))
-        export_menu.addAction(export_csv_action)
-
-        export_sac_action = QAction("SAC формат...", self)
-        export_sac_action.triggered.connect(lambda: self.show_export_dialog("SAC"))
-        export_menu.addAction(export_sac_action)
-
-        export_npy_action = QAction("NumPy NPY/NPZ...", self)
-        export_npy_action.triggered.connect(lambda: self.show_export_dialog("NPY"))
-        export_menu.addAction(export_npy_action)
-
-        export_mseed_action = QAction("MiniSEED...", self)
-        export_mseed_action.triggered.connect(lambda: self.show_export_dialog("MiniSEED"))
-        export_menu.addAction(export_mseed_action)
+        # Подменю экспорта заполняется при первом открытии
+        self.export_menu = file_menu.addMenu("Экспорт")
+        self._export_menu_built = False
+        self.export_menu.aboutToShow.connect(self._populate_export_menu)
 
         # Меню Edit
         edit_menu = menubar.addMenu("Правка")
 
-        undo_action = QAction("Отменить", self)
-        undo_action.setShortcut(QKeySequence.Undo)
-        undo_action.triggered.connect(self.canvas.undo)
-        edit_menu.addAction(undo_action)
-
-        redo_action = QAction("Повторить", self)
-        redo_action.setShortcut(QKeySequence.Redo)
-        redo_action.triggered.connect(self.canvas.redo)
-        edit_menu.addAction(redo_action)
+        edit_menu.addAction(self._create_action(
+            "Отменить", self.canvas.undo, QKeySequence.Undo, "edit-undo"))
+        edit_menu.addAction(self._create_action(
+            "Повторить", self.canvas.redo, QKeySequence.Redo, "edit-redo"))
 
         edit_menu.addSeparator()
 
-        settings_action = QAction("Настройки проекта...", self)
-        settings_action.triggered.connect(self.project_settings)
-        edit_menu.addAction(settings_action)
+        edit_menu.addAction(self._create_action(
+            "Настройки проекта...", self.project_settings, icon_name="preferences-system"))
 
         # Меню View
         view_menu = menubar.addMenu("Вид")
 
-        zoom_in_action = QAction("Приблизить", self)
-        zoom_in_action.setShortcut(QKeySequence.ZoomIn)
-        zoom_in_action.triggered.connect(lambda: self.canvas.scale(1.2, 1.2))
-        view_menu.addAction(zoom_in_action)
+        view_menu.addAction(self._create_action(
+            "Приблизить", partial(self.canvas.scale, 1.2, 1.2), QKeySequence.ZoomIn, "zoom-in"))
+        view_menu.addAction(self._create_action(
+            "Отдалить", partial(self.canvas.scale, 0.8, 0.8), QKeySequence.ZoomOut, "zoom-out"))
+        view_menu.addAction(self._create_action(
+            "Подогнать под размер", self.fit_view, QKeySequence("Ctrl+F"), "zoom-fit-best"))
+
+    def _populate_recent_menu(self):
+        """Заполнить подменю недавних проектов"""
+        self.recent_menu.clear()
+        if not self._recent_files:
+            empty_action = self.recent_menu.addAction("(пусто)")
+            empty_action.setEnabled(False)
+            return
+        for path in self._recent_files:
+            action = self.recent_menu.addAction(path)
+            action.triggered.connect(partial(self._open_recent, path))
+
+    def _open_recent(self, path):
+        """Открыть проект из списка недавних без диалога выбора файла"""
+        if not self.maybe_save():
+            return
+        if not Path(path).exists():
+            QMessageBox.warning(self, "Ошибка", f"Файл не найден:\n{path}")
+            self._recent_files.remove(path)
+            return
+        self._open_project_file(path)
 
-        zoom_out_action = QAction("Отдалить", self)
-        zoom_out_action.setShortcut(QKeySequence.ZoomOut)
-        zoom_out_action.triggered.connect(lambda: self.canvas.scale(0.8, 0.8))
-        view_menu.addAction(zoom_out_action)
+    def _populate_export_menu(self):
+        """Создает действия подменю экспорта при первом показе"""
+        if self._export_menu_built:
+            return
+        self._export_menu_built = True
 
-        fit_view_action = QAction("Подогнать под размер", self)
-        fit_view_action.setShortcut(QKeySequence("Ctrl+F"))
-        fit_view_action.triggered.connect(self.fit_view)
-        view_menu.addAction(fit_view_action)
+        for text, format_type in (("CSV формат...", "CSV"),
+                                  ("SAC формат...", "SAC"),
+                                  ("NumPy NPY/NPZ...", "NPY"),
+                                  ("MiniSEED...", "MiniSEED")):
+            self.export_menu.addAction(self._create_action(
+                text, partial(self.show_export_dialog, format_type)))
 
     def setup_statusbar(self):
         """Настройка строки состояния"""
         self.statusbar = QStatusBar()
         self.setStatusBar(self.statusbar)
 
+        self.project_info_label = QLabel()
+        self.statusbar.addPermanentWidget(self.project_info_label)
+
         self.statusbar.showMessage("Готов к работе")
 
+    def update_project_info(self):
+        """Запланировать обновление сводки; несколько вызовов подряд сливаются в один"""
+        if not self._update_pending:
+            self._update_pending = True
+            self._update_timer.start()
+
+    def _do_update_project_info(self):
+        """Пересчитать и показать сводку по текущему проекту"""
+        self._update_pending = False
+        project = self.current_project
+        if project is None:
+            self._last_stats_key = None
+            self.project_info_label.clear()
+            return
+
+        # Любое изменение проекта проходит через mark_dirty() и увеличивает
+        # version, поэтому без него пересчитывать сводку незачем
+        key = (id(project), project.version)
+        if key == self._last_stats_key:
+            return
+        self._last_stats_key = key
+
+        num_intervals = 0
+        num_points = 0
+        for trace in project.traces:
+            num_intervals += len(trace.intervals)
+            for interval in trace.intervals:
+                num_points += len(interval.points)
+
+        self.project_info_label.setText(
+            f"Трасс: {len(project.traces)} | Интервалов: {num_intervals} | Точек: {num_points}"
+        )
+
     def new_project(self):
         """Создать новый проект"""
+        if not self.maybe_save():
+            return
         name, ok = QInputDialog.getText(self, "Новый проект", "Название проекта:")
         if ok and name:
             self.current_project = Project(name=name)
@@ -158,32 +394,72 @@ class MainWindow(QMainWindow):
             self.canvas.current_trace = None
             self.canvas.current_interval = None
             self.canvas.update_display()
+            self.update_project_info()
             self.statusbar.showMessage(f"Создан проект: {name}")
 
     def open_project(self):
         """Открыть существующий проект"""
+        if not self.maybe_save():
+            return
         filepath, _ = QFileDialog.getOpenFileName(
-            self, "Открыть проект", "", "Trace Project (*.trace)"
+            self, "Открыть проект", self._last_dir, "Trace Project (*.trace)"
         )
         if filepath:
-            self.current_project = Project.load(Path(filepath))
-            if self.current_project.raster_data is not None:
-                self.canvas.load_image(self.current_project.raster_data)
+            self._open_project_file(filepath)
 
-            self.canvas.current_project = self.current_project
+    def _open_project_file(self, filepath):
+        """Загрузить проект из файла в фоновом потоке"""
+        if self._project_worker is not None:
+            return
 
-            for trace in self.current_project.traces:
-                trace.is_visible = True
-                trace.is_editing = False
+        self._project_progress = QProgressDialog("Загрузка проекта...", None, 0, 0, self)
+        self._project_progress.setWindowModality(Qt.WindowModal)
+        self._project_progress.setMinimumDuration(300)
+
+        worker = ProjectLoadWorker(filepath, self)
+        worker.finished_ok.connect(self._on_project_loaded)
+        worker.failed.connect(self._on_project_failed)
+        worker.finished.connect(self._on_project_worker_finished)
+        self._project_worker = worker
+        self.statusbar.showMessage(f"Загрузка проекта: {filepath}")
+        worker.start()
+
+    def _on_project_failed(self, message):
+        """Ошибка фоновой загрузки проекта"""
+        QMessageBox.warning(self, "Ошибка", f"Не удалось открыть проект:\n{message}")
+
+    def _on_project_worker_finished(self):
+        """Освобождает поток загрузки проекта и закрывает индикатор"""
+        if self._project_progress is not None:
+            self._project_progress.close()
+            self._project_progress = None
+        if self._project_worker is not None:
+            self._project_worker.deleteLater()
+            self._project_worker = None
+
+    def _on_project_loaded(self, project):
+        """Делает загруженный проект текущим (поток GUI)"""
+        filepath = self._project_worker.filepath
+        self.current_project = project
+        self._remember_path(filepath, recent=True)
+        if self.current_project.raster_data is not None:
+            self.canvas.load_image(self.current_project.raster_data)
+
+        self.canvas.current_project = self.current_project
+
+        for trace in self.current_project.traces:
+            trace.is_visible = True
+            trace.is_editing = False
 
-            self.canvas.current_trace = None
-            self.canvas.current_interval = None
-            self.canvas.update_display()
+        self.canvas.current_trace = None
+        self.canvas.current_interval = None
+        self.canvas.update_display()
 
-            # Обновляем селектор трасс
-            self.controls_panel.update_trace_selector(self.current_project.traces, None)
+        # Обновляем селектор трасс
+        self.controls_panel.update_trace_selector(self.current_project.traces, None)
+        self.update_project_info()
 
-            self.statusbar.showMessage(f"Загружен проект: {self.current_project.name}")
+        self.statusbar.showMessage(f"Загружен проект: {self.current_project.name}")
 
     def save_project(self):
         """Сохранить проект"""
@@ -203,48 +479,104 @@ class MainWindow(QMainWindow):
             if filepath:
                 self.current_project.filepath = Path(filepath)
                 self.current_project.save()
+                self._remember_path(filepath, recent=True)
                 self.statusbar.showMessage(f"Проект сохранен: {filepath}")
 
     def import_raster(self):
         """Импортировать растер"""
         filepath, _ = QFileDialog.getOpenFileName(
             self, "Импортировать растер",
-            "", "Images (*.png *.jpg *.jpeg *.bmp *.tiff *.tif)"
+            self._last_dir, "Images (*.png *.jpg *.jpeg *.bmp *.tiff *.tif)"
         )
 
         if filepath and self.current_project:
-            from PIL import Image
-            import numpy as np
-
-            img = Image.open(filepath)
+            if self._raster_worker is not None:
+                return
+            self._remember_path(filepath)
+
+            self._raster_progress = QProgressDialog("Загрузка растра...", None, 0, 100, self)
+            self._raster_progress.setWindowModality(Qt.WindowModal)
+            self._raster_progress.setMinimumDuration(300)
+
+            worker = RasterLoadWorker(filepath, self)
+            # Растр относится к проекту, открытому в момент запроса
+            worker.project = self.current_project
+            worker.progress.connect(self._raster_progress.setValue)
+            worker.finished_ok.connect(self._on_raster_loaded)
+            worker.failed.connect(self._on_raster_failed)
+            worker.finished.connect(self._on_raster_worker_finished)
+            self._raster_worker = worker
+            self.statusbar.showMessage(f"Загрузка растра: {filepath}")
+            worker.start()
+
+    def _on_raster_loaded(self, raster_data, path):
+        """Применяет загруженный растр к проекту, для которого он запрашивался"""
+        project = self._raster_worker.project
+        project.raster_data = raster_data
+        project.raster_path = path
+        project.mark_dirty()
+        if project is self.current_project:
+            self.canvas.load_image(raster_data)
+        self.statusbar.showMessage(f"Загружен растер: {path}")
 
-            if img.mode == 'L':
-                raster_data = np.array(img, dtype=np.uint8)
-            else:
-                img = img.convert('RGB')
-                raster_data = np.array(img, dtype=np.uint8)
+    def _on_raster_failed(self, message):
+        """Ошибка фоновой загрузки растра"""
+        QMessageBox.warning(self, "Ошибка", f"Не удалось загрузить растр:\n{message}")
 
-            self.current_project.raster_data = raster_data
-            self.current_project.raster_path = Path(filepath)
-            self.canvas.load_image(raster_data)
-            self.statusbar.showMessage(f"Загружен растер: {filepath}")
+    def _on_raster_worker_finished(self):
+        """Освобождает поток загрузки и закрывает индикатор прогресса"""
+        if self._raster_progress is not None:
+            self._raster_progress.close()
+            self._raster_progress = None
+        if self._raster_worker is not None:
+            self._raster_worker.deleteLater()
+            self._raster_worker = None
 
     def fit_view(self):
         """Подогнать изображение под размер окна"""
         if self.canvas.pixmap_item:
             self.canvas.fitInView(self.canvas.pixmap_item, Qt.KeepAspectRatio)
 
+    def _get_dialog(self, kind, key, factory):
+        """Вернуть диалог из пула, создав его при первом обращении.
+
+        Возвращает (диалог, создан_ли_сейчас)."""
+        dialog = self._dialog_pool.get((kind, key))
+        if dialog is not None:
+            return dialog, False
+        dialog = factory()
+        self._dialog_pool[(kind, key)] = dialog
+        return dialog, True
+
+    def _get_export_dialog(self, format_type):
+        """Диалог экспорта для формата; при повторном открытии обновляет список трасс"""
+        dialog, created = self._get_dialog(
+            'export', format_type,
+            partial(_dialog_class('ExportDialog'), self, format_type=format_type))
+        if not created:
+            dialog.refresh()
+        return dialog
+
     def project_settings(self):
         """Настройки проекта"""
-        from gui.dialogs.raster_settings_dialog import RasterSettingsDialog
-        dialog = RasterSettingsDialog(self.workspace_settings, self)
+        initial = self.workspace_settings if isinstance(self.workspace_settings, dict) else None
+        dialog, _ = self._get_dialog(
+            'raster_settings', None,
+            partial(_dialog_class('RasterSettingsDialog'), self, initial_settings=initial))
         if dialog.exec_():
             self.workspace_settings = dialog.get_settings()
             self.statusbar.showMessage("Настройки проекта обновлены")
 
+    def on_canvas_data_changed(self):
+        """Точки оцифровки изменены на холсте"""
+        if self.current_project:
+            self.current_project.mark_dirty()
+        self.update_project_info()
+
     def interpolate_current_interval(self):
         """Интерполяция текущего интервала"""
         if self.canvas.current_interval and len(self.canvas.current_interval.points) >= 2:
+            from core.digitizer_engine import DigitizerEngine
             x_interp, y_interp = DigitizerEngine.interpolate_interval(
                 self.canvas.current_interval,
                 num_points=500
@@ -256,12 +588,14 @@ class MainWindow(QMainWindow):
     def remove_trend_current_interval(self):
         """Удалить тренд текущего интервала"""
         if self.canvas.current_interval and len(self.canvas.current_interval.points) >= 2:
+            from core.digitizer_engine import DigitizerEngine
             corrected_points = DigitizerEngine.remove_trend(
                 self.canvas.current_interval.points,
                 degree=1
             )
             self.canvas.current_interval.points = corrected_points
             self.canvas.update_display()
+            self.on_canvas_data_changed()
             self.statusbar.showMessage("Тренд удален")
         else:
             QMessageBox.warning(self, "Ошибка", "Недостаточно точек для удаления тренда")
@@ -294,7 +628,6 @@ class MainWindow(QMainWindow):
 
         # Устанавливаем текущую трассу
         self.canvas.set_current_trace(trace)
-        self.canvas.update_display()
 
         # Обновляем селектор
         self.controls_panel.set_selected_trace(trace_id)
@@ -331,8 +664,7 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Ошибка", "Сначала загрузите растер")
             return
 
-        from gui.dialogs.trace_manager_dialog import TraceManagerDialog
-        dialog = TraceManagerDialog(self.current_project, self)
+        dialog = _dialog_class('TraceManagerDialog')(self.current_project, self)
         dialog.trace_selected_for_editing.connect(self.on_trace_selected_for_editing)
 
         old_traces_count = len(self.current_project.traces)
@@ -341,6 +673,7 @@ class MainWindow(QMainWindow):
         new_traces_count = len(self.current_project.traces)
         if new_traces_count != old_traces_count:
             self.controls_panel.update_trace_selector(self.current_project.traces, None)
+        self.update_project_info()
 
     def on_trace_selected_for_editing(self, trace):
         """Обработка выбора трассы для оцифровки из менеджера"""
@@ -350,7 +683,6 @@ class MainWindow(QMainWindow):
 
         # Устанавливаем текущую трассу
         self.canvas.set_current_trace(trace)
-        self.canvas.update_display()
 
         # Обновляем селектор
         self.controls_panel.set_selected_trace(trace.id)
@@ -367,8 +699,7 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Ошибка", "Нет созданных трасс")
             return
 
-        from gui.dialogs.visibility_dialog import VisibilityDialog
-        dialog = VisibilityDialog(self.current_project, self)
+        dialog = _dialog_class('VisibilityDialog')(self.current_project, self)
         dialog.visibility_changed.connect(self.on_visibility_changed)
         dialog.exec_()
 
@@ -455,6 +786,4 @@ class MainWindow(QMainWindow):
 
     def show_export_dialog(self, format_type):
         """Показать диалог экспорта для выбранного формата"""
-        from gui.dialogs.export_dialog import ExportDialog
-        dialog = ExportDialog(self, format_type=format_type)
-        dialog.exec_()
\ No newline at end of file
+        self._get_export_dialog(format_type).exec_()
\ No newline at end of file
@@ -1,10 +1,20 @@
-from PyQt5.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsPixmapItem
-from PyQt5.QtCore import Qt, QPointF, QRectF, pyqtSignal
-from PyQt5.QtGui import QPixmap, QPainter, QPen, QColor, QWheelEvent, QMouseEvent
+from PyQt5.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsPixmapItem, QOpenGLWidget
+from PyQt5.QtCore import Qt, QPointF, QRectF, QTimer, pyqtSignal
+from PyQt5.QtGui import (QPixmap, QPainter, QPen, QBrush, QColor, QWheelEvent, QMouseEvent,
+                         QPainterPath, QSurfaceFormat)
 import numpy as np
+from functools import partial
+
+# Цвета трасс (0xRRGGBB); QColor создаются один раз, а не на каждый интервал
+ACTIVE_TRACE_RGB = 0xFF3232
+INACTIVE_TRACE_RGB = 0xFFD700
+ACTIVE_TRACE_COLOR = QColor(ACTIVE_TRACE_RGB)
+INACTIVE_TRACE_COLOR = QColor(INACTIVE_TRACE_RGB)
 
 
 class RasterCanvas(QGraphicsView):
+    # Изменились точки оцифровки (добавление, удаление, перемещение, отмена)
+    data_changed = pyqtSignal()
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -12,11 +22,26 @@ class RasterCanvas(QGraphicsView):
         self.scene = QGraphicsScene(self)
         self.setScene(self.scene)
 
+        # Отрисовка сцены через OpenGL: растр загружается в текстуру один раз
+        # и при панорамировании/масштабировании рисуется GPU, без растеризации
+        # пикс-мапа на CPU в каждом кадре
+        gl_viewport = QOpenGLWidget()
+        gl_format = QSurfaceFormat()
+        gl_format.setSamples(4)  # Сглаживание линий трасс
+        gl_viewport.setFormat(gl_format)
+        self.setViewport(gl_viewport)
+        # С OpenGL кадр все равно перерисовывается целиком
+        self.setViewportUpdateMode(QGraphicsView.FullViewportUpdate)
+
         self.pixmap_item = None
         self.current_image = None
+        # Границы растра (left, top, right, bottom), считаются один раз при загрузке
+        self._raster_bounds = None
 
         # Режимы взаимодействия
         self.mode = 'pan'  # pan, add_point, delete_point, move_point, digitize
+        # Режим, в который возвращает повторное нажатие пробела
+        self._prev_mode = 'add_point'
 
         # Данные оцифровки
         self.current_project = None
@@ -36,9 +61,11 @@ class RasterCanvas(QGraphicsView):
         self.show_points = True
         self.show_lines = True
         self.point_size = 8
-        self.line_color = QColor(255, 50, 50)
+        self.line_color = QColor(ACTIVE_TRACE_COLOR)
         self.line_width = 2
-        self.point_color = QColor(255, 50, 50)
+        self.point_color = QColor(ACTIVE_TRACE_COLOR)
+        # Кэш перьев и кистей: (rgba, толщина линии) -> (перо линии, перо точки, кисть)
+        self._pen_cache = {}
 
         # Zoom limits
         self.min_zoom = 0.1
@@ -49,9 +76,25 @@ class RasterCanvas(QGraphicsView):
         self.dragging_point = False
         self.dragging_point_idx = -1
 
+        # Кэш полилиний интервалов: id -> (список точек, число точек в пути, путь)
+        self._path_cache = {}
+
+        # Отложенная перерисовка сцены (см. request_display_update)
+        self._display_update_pending = False
+
         # Настройка Drag Mode для панорамирования
         self.setDragMode(QGraphicsView.ScrollHandDrag)
 
+        # Обработчики клавиш: код клавиши -> метод
+        self._key_table = {
+            Qt.Key_Plus: partial(self._zoom_by, 1.25),
+            Qt.Key_Equal: partial(self._zoom_by, 1.25),
+            Qt.Key_Minus: partial(self._zoom_by, 0.8),
+            Qt.Key_Home: self._fit_to_window,
+            Qt.Key_F: self._fit_to_window,
+            Qt.Key_Space: self._toggle_pan_mode,
+        }
+
     def load_image(self, image_array: np.ndarray):
         """Загрузить изображение из numpy array"""
         if image_array is None:
@@ -64,13 +107,14 @@ class RasterCanvas(QGraphicsView):
 
             from PyQt5.QtGui import QImage
 
+            # QImage только ссылается на буфер, а QPixmap.fromImage копирует
+            # пиксели сам - копия массива нужна лишь для приведения типа
+            # или непрерывной раскладки
+            img_data = np.ascontiguousarray(image_array, dtype=np.uint8)
+            bytes_per_line = img_data.strides[0]
             if len(image_array.shape) == 2:
-                bytes_per_line = width
-                img_data = image_array.astype(np.uint8).copy()
                 qimage = QImage(img_data.data, width, height, bytes_per_line, QImage.Format_Grayscale8)
             else:
-                bytes_per_line = 3 * width
-                img_data = image_array.astype(np.uint8).copy()
                 qimage = QImage(img_data.data, width, height, bytes_per_line, QImage.Format_RGB888)
 
             pixmap = QPixmap.fromImage(qimage)
@@ -87,6 +131,9 @@ class RasterCanvas(QGraphicsView):
             self.setSceneRect(QRectF(pixmap.rect()))
 
             self.current_image = image_array
+            rect = self.pixmap_item.boundingRect()
+            self._raster_bounds = (rect.left(), rect.top(), rect.right(), rect.bottom())
+            self._path_cache.clear()
             self.fitInView(self.pixmap_item, Qt.KeepAspectRatio)
             self.current_zoom = 1.0
 
@@ -121,22 +168,20 @@ class RasterCanvas(QGraphicsView):
     def mousePressEvent(self, event: QMouseEvent):
         """Обработка кликов мыши"""
         if event.button() == Qt.LeftButton:
-            scene_pos = self.mapToScene(event.pos())
+            x, y = self._event_scene_xy(event)
 
             # Проверяем клик внутри растра
-            if self.pixmap_item:
-                rect = self.pixmap_item.boundingRect()
-                if not rect.contains(scene_pos):
-                    super().mousePressEvent(event)
-                    return
+            if self._raster_bounds and self._clamp_to_raster(x, y) != (x, y):
+                super().mousePressEvent(event)
+                return
 
             # Обработка в зависимости от режима
             if self.mode == 'add_point':
-                self.add_point(scene_pos.x(), scene_pos.y())
+                self.add_point(x, y)
             elif self.mode == 'delete_point':
-                self.delete_nearest_point(scene_pos.x(), scene_pos.y())
+                self.delete_nearest_point(x, y)
             elif self.mode == 'move_point':
-                self.start_move_point(scene_pos.x(), scene_pos.y())
+                self.start_move_point(x, y)
             elif self.mode == 'pan':
                 super().mousePressEvent(event)
             else:
@@ -147,26 +192,40 @@ class RasterCanvas(QGraphicsView):
     def mouseMoveEvent(self, event: QMouseEvent):
         """Обработка движения мыши"""
         if self.mode == 'move_point' and self.dragging_point and self.dragging_point_idx >= 0:
-            scene_pos = self.mapToScene(event.pos())
-            if self.pixmap_item:
-                rect = self.pixmap_item.boundingRect()
-                x = max(rect.left(), min(rect.right(), scene_pos.x()))
-                y = max(rect.top(), min(rect.bottom(), scene_pos.y()))
+            if self._raster_bounds:
+                x, y = self._clamp_to_raster(*self._event_scene_xy(event))
 
                 if self.current_interval and self.dragging_point_idx < len(self.current_interval.points):
                     point = self.current_interval.points[self.dragging_point_idx]
+                    # Курсор за краем растра или сдвиг меньше субпикселя - перерисовка не нужна
+                    if point.x == x and point.y == y:
+                        return
                     point.x = x
                     point.y = y
-                    self.update_display()
+                    self._path_cache.pop(self.current_interval.id, None)
+                    self.request_display_update()
         else:
             super().mouseMoveEvent(event)
 
+    def _event_scene_xy(self, event):
+        """Координаты события мыши в сцене (float)"""
+        scene_pos = self.mapToScene(event.pos())
+        return scene_pos.x(), scene_pos.y()
+
+    def _clamp_to_raster(self, x: float, y: float):
+        """Прижать координаты к границам растра (границы посчитаны при загрузке)"""
+        if not self._raster_bounds:
+            return x, y
+        left, top, right, bottom = self._raster_bounds
+        return max(left, min(right, x)), max(top, min(bottom, y))
+
     def mouseReleaseEvent(self, event: QMouseEvent):
         """Обработка отпускания кнопки"""
         if self.mode == 'move_point' and self.dragging_point:
             self.dragging_point = False
             self.dragging_point_idx = -1
             self.save_to_history()
+            self.data_changed.emit()
         super().mouseReleaseEvent(event)
 
     def add_point(self, x: float, y: float):
@@ -186,33 +245,25 @@ class RasterCanvas(QGraphicsView):
             self.current_trace.add_interval(self.current_interval)
 
         # Проверяем границы
-        if self.pixmap_item:
-            rect = self.pixmap_item.boundingRect()
-            x = max(rect.left(), min(rect.right(), x))
-            y = max(rect.top(), min(rect.bottom(), y))
+        x, y = self._clamp_to_raster(x, y)
 
         self.save_to_history()
         self.current_interval.add_point(x, y)
         self.update_display()
+        self.data_changed.emit()
 
     def delete_nearest_point(self, x: float, y: float, radius: float = 10.0):
         """Удалить ближайшую точку"""
         if not self.current_interval or not self.current_interval.points:
             return
 
-        min_dist = float('inf')
-        min_idx = -1
-
-        for i, point in enumerate(self.current_interval.points):
-            dist = ((point.x - x) ** 2 + (point.y - y) ** 2) ** 0.5
-            if dist < min_dist and dist < radius:
-                min_dist = dist
-                min_idx = i
+        min_idx = self._nearest_point_index(x, y, radius)
 
         if min_idx >= 0:
             self.save_to_history()
             self.current_interval.remove_point(min_idx)
             self.update_display()
+            self.data_changed.emit()
 
     def start_move_point(self, x: float, y: float, radius: float = 10.0):
         """Начать перемещение точки"""
@@ -220,14 +271,7 @@ class RasterCanvas(QGraphicsView):
             self.dragging_point = False
             return
 
-        min_dist = float('inf')
-        self.dragging_point_idx = -1
-
-        for i, point in enumerate(self.current_interval.points):
-            dist = ((point.x - x) ** 2 + (point.y - y) ** 2) ** 0.5
-            if dist < min_dist and dist < radius:
-                min_dist = dist
-                self.dragging_point_idx = i
+        self.dragging_point_idx = self._nearest_point_index(x, y, radius)
 
         if self.dragging_point_idx >= 0:
             self.save_to_history()
@@ -235,6 +279,18 @@ class RasterCanvas(QGraphicsView):
         else:
             self.dragging_point = False
 
+    def _nearest_point_index(self, x: float, y: float, radius: float) -> int:
+        """Индекс ближайшей к (x, y) точки текущего интервала в пределах radius, иначе -1"""
+        points = self.current_interval.points
+        n = len(points)
+        xs = np.fromiter((p.x for p in points), dtype=np.float64, count=n)
+        ys = np.fromiter((p.y for p in points), dtype=np.float64, count=n)
+
+        # Сравниваем квадраты расстояний - корень не нужен
+        dist2 = (xs - x) ** 2 + (ys - y) ** 2
+        idx = int(np.argmin(dist2))
+        return idx if dist2[idx] < radius * radius else -1
+
     def finish_current_interval(self) -> bool:
         """Завершить текущий интервал"""
         if self.current_interval and len(self.current_interval.points) > 0:
@@ -254,6 +310,7 @@ class RasterCanvas(QGraphicsView):
 
             self.current_interval = new_interval
             self.update_display()
+            self.data_changed.emit()
             return True
         return False
 
@@ -293,9 +350,22 @@ class RasterCanvas(QGraphicsView):
             self.current_interval.points.append(Point2D(x, y, ptype))
 
         self.update_display()
+        self.data_changed.emit()
+
+    def request_display_update(self):
+        """Запланировать перерисовку; запросы в пределах одного прохода цикла событий сливаются"""
+        if not self._display_update_pending:
+            self._display_update_pending = True
+            QTimer.singleShot(0, self._flush_display_update)
+
+    def _flush_display_update(self):
+        """Выполнить отложенную перерисовку"""
+        if self._display_update_pending:
+            self.update_display()
 
     def update_display(self):
         """Обновить отображение"""
+        self._display_update_pending = False
         if not self.pixmap_item:
             return
 
@@ -306,18 +376,18 @@ class RasterCanvas(QGraphicsView):
                 self.scene.removeItem(item)
 
         # Рисуем ВСЕ видимые трассы из проекта
-        if hasattr(self, 'current_trace') and self.current_trace:
+        if self.current_trace:
             # Если есть активная трасса - рисуем её и все видимые из проекта
-            if hasattr(self.current_trace, 'project') and self.current_trace.project:
+            if self.current_trace.project:
                 for trace in self.current_trace.project.traces:
                     if trace.is_visible:
                         for interval in trace.intervals:
                             if interval and interval.points:
                                 # Разный цвет для активной и неактивной трассы
                                 if trace == self.current_trace:
-                                    self.draw_interval(interval, color=QColor(255, 50, 50))
+                                    self.draw_interval(interval, color=ACTIVE_TRACE_COLOR)
                                 else:
-                                    self.draw_interval(interval, color=QColor(255, 215, 0))
+                                    self.draw_interval(interval, color=INACTIVE_TRACE_COLOR)
             else:
                 # Если нет проекта, но есть текущая трасса
                 if self.current_trace and self.current_trace.is_visible:
@@ -326,12 +396,30 @@ class RasterCanvas(QGraphicsView):
                             self.draw_interval(interval)
         else:
             # Нет активной трассы - рисуем ВСЕ видимые трассы из проекта
-            if hasattr(self, 'current_project') and self.current_project:
+            if self.current_project:
                 for trace in self.current_project.traces:
                     if trace.is_visible:
                         for interval in trace.intervals:
                             if interval and interval.points:
-                                self.draw_interval(interval, color=QColor(255, 50, 50))  # Синий цвет для обзора
+                                self.draw_interval(interval, color=ACTIVE_TRACE_COLOR)
+
+        self._prune_path_cache()
+
+    def _prune_path_cache(self):
+        """Убрать из кэша путей интервалы, которых больше нет (удалены, очищены, сменился проект)"""
+        if not self._path_cache:
+            return
+        if self.current_trace and self.current_trace.project:
+            traces = self.current_trace.project.traces
+        elif self.current_trace:
+            traces = [self.current_trace]
+        elif self.current_project:
+            traces = self.current_project.traces
+        else:
+            traces = []
+        live = {interval.id for trace in traces for interval in trace.intervals if interval}
+        for interval_id in [i for i in self._path_cache if i not in live]:
+            del self._path_cache[interval_id]
 
     def draw_interval(self, interval, color=None):
         """Нарисовать интервал"""
@@ -344,28 +432,53 @@ class RasterCanvas(QGraphicsView):
         if num_points == 0:
             return
 
-        line_color = color if color else self.line_color
-        point_color = color if color else self.point_color
+        line_pen, _, _ = self._pens_for(color if color else self.line_color)
+        _, point_pen, point_brush = self._pens_for(color if color else self.point_color)
+
+        line_path, marker_path = self._interval_paths(interval)
 
         # Рисуем линии
         if self.show_lines and num_points > 1:
-            pen = QPen(line_color, self.line_width)
-            for i in range(num_points - 1):
-                self.scene.addLine(
-                    points[i].x, points[i].y,
-                    points[i + 1].x, points[i + 1].y,
-                    pen
-                )
-
-        # Рисуем точки
+            self.scene.addPath(line_path, line_pen)
+
+        # Рисуем точки - все маркеры интервала одним элементом сцены
         if self.show_points:
-            for point in points:
-                ellipse = self.scene.addEllipse(
-                    point.x - self.point_size / 2,
-                    point.y - self.point_size / 2,
-                    self.point_size, self.point_size,
-                    QPen(point_color), point_color
-                )
+            self.scene.addPath(marker_path, point_pen, point_brush)
+
+    def _pens_for(self, color: QColor):
+        """Перо линии, перо и кисть точек для цвета (кэшируются по упакованному rgba)"""
+        key = (color.rgba(), self.line_width)
+        pens = self._pen_cache.get(key)
+        if pens is None:
+            pens = (QPen(color, self.line_width), QPen(color), QBrush(color))
+            self._pen_cache[key] = pens
+        return pens
+
+    def _interval_paths(self, interval):
+        """Полилиния и маркеры точек интервала; при добавлении точек дописывается только хвост"""
+        points = interval.points
+        size = self.point_size
+        cached = self._path_cache.get(interval.id)
+
+        # Список заменён (undo, удаление тренда), точки удалены или сменился размер - строим заново
+        if cached and cached[0] is points and cached[1] <= len(points) and cached[4] == size:
+            _, count, line_path, marker_path, _ = cached
+        else:
+            count, line_path, marker_path = 0, QPainterPath(), QPainterPath()
+            # Перекрывающиеся маркеры не должны вычитаться друг из друга
+            marker_path.setFillRule(Qt.WindingFill)
+
+        if count == 0 and points:
+            line_path.moveTo(points[0].x, points[0].y)
+        half = size / 2
+        for i in range(count, len(points)):
+            point = points[i]
+            if i > 0:
+                line_path.lineTo(point.x, point.y)
+            marker_path.addEllipse(point.x - half, point.y - half, size, size)
+
+        self._path_cache[interval.id] = (points, len(points), line_path, marker_path, size)
+        return line_path, marker_path
 
     def set_mode(self, mode: str):
         """Установить режим взаимодействия"""
@@ -407,27 +520,30 @@ class RasterCanvas(QGraphicsView):
 
     def keyPressEvent(self, event):
         """Обработка клавиш"""
-        if event.key() == Qt.Key_Plus or event.key() == Qt.Key_Equal:
-            factor = 1.25
-            new_zoom = self.current_zoom * factor
-            if new_zoom <= self.max_zoom:
-                self.scale(factor, factor)
-                self.current_zoom = new_zoom
-        elif event.key() == Qt.Key_Minus:
-            factor = 0.8
-            new_zoom = self.current_zoom * factor
-            if new_zoom >= self.min_zoom:
-                self.scale(factor, factor)
-                self.current_zoom = new_zoom
-        elif event.key() == Qt.Key_Home or event.key() == Qt.Key_F:
-            self.resetTransform()
-            if self.pixmap_item:
-                self.fitInView(self.pixmap_item, Qt.KeepAspectRatio)
-            self.current_zoom = 1.0
-        elif event.key() == Qt.Key_Space:
-            if self.mode != 'pan':
-                self.set_mode('pan')
-            else:
-                self.set_mode(self._prev_mode if hasattr(self, '_prev_mode') else 'add_point')
+        handler = self._key_table.get(event.key())
+        if handler is not None:
+            handler()
+        else:
+            super().keyPressEvent(event)
+
+    def _zoom_by(self, factor: float):
+        """Масштабировать вид с учетом ограничений масштаба"""
+        new_zoom = self.current_zoom * factor
+        if self.min_zoom <= new_zoom <= self.max_zoom:
+            self.scale(factor, factor)
+            self.current_zoom = new_zoom
+
+    def _fit_to_window(self):
+        """Сбросить масштаб и вписать изображение в окно"""
+        self.resetTransform()
+        if self.pixmap_item:
+            self.fitInView(self.pixmap_item, Qt.KeepAspectRatio)
+        self.current_zoom = 1.0
+
+    def _toggle_pan_mode(self):
+        """Переключиться между панорамированием и предыдущим инструментом"""
+        if self.mode != 'pan':
+            self._prev_mode = self.mode
+            self.set_mode('pan')
         else:
-            super().keyPressEvent(event)
\ No newline at end of file
+            self.set_mode(self._prev_mode)
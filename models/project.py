@@ -20,11 +20,27 @@ class Project:
     workspace_settings: Dict[str, Any] = field(default_factory=dict)
     created_at: datetime = field(default_factory=datetime.now)
     modified_at: datetime = field(default_factory=datetime.now)
+    # Есть несохраненные изменения; сбрасывается при сохранении
+    dirty: bool = field(default=False, init=False, repr=False, compare=False)
+    # Счетчик изменений: растет в mark_dirty(); в отличие от modified_at
+    # не зависит от разрешения и переводов системных часов
+    version: int = field(default=0, init=False, repr=False, compare=False)
+    # Индекс ID трассы -> позиция в списке; позиция проверяется при поиске,
+    # и индекс пересобирается, если список трасс изменен напрямую
+    _trace_index: Dict[str, int] = field(default_factory=dict, init=False,
+                                         repr=False, compare=False)
+
+    def mark_dirty(self):
+        """Отметить проект как измененный"""
+        self.dirty = True
+        self.version += 1
+        self.modified_at = datetime.now()
 
     def add_trace(self, trace):
         trace.project = self
         self.traces.append(trace)
-        self.modified_at = datetime.now()
+        self._trace_index[trace.id] = len(self.traces) - 1
+        self.mark_dirty()
 
     def remove_trace(self, trace_id: str):
         """Удалить трассу по ID"""
@@ -35,14 +51,22 @@ class Project:
                     trace.clear()
                 # Удаляем из списка
                 self.traces.pop(i)
-                self.modified_at = datetime.now()
+                # Позиции следующих трасс сдвинулись - индекс пересоберется
+                self._trace_index = {}
+                self.mark_dirty()
                 return
 
     def get_trace(self, trace_id: str) -> Optional:
-        for trace in self.traces:
+        """Найти трассу по ID (через индекс, без перебора списка)"""
+        position = self._trace_index.get(trace_id)
+        if position is not None and position < len(self.traces):
+            trace = self.traces[position]
             if trace.id == trace_id:
                 return trace
-        return None
+        # Список изменен в обход add_trace/remove_trace - пересобираем индекс
+        self._trace_index = {trace.id: i for i, trace in enumerate(self.traces)}
+        position = self._trace_index.get(trace_id)
+        return self.traces[position] if position is not None else None
 
     def save(self, filepath: Optional[Path] = None):
         """Сохранить проект в .trace файл"""
@@ -93,6 +117,7 @@ class Project:
                 img.save(zf.open('raster.png', 'w'), 'PNG')
 
         self.filepath = save_path
+        self.dirty = False
 
     @classmethod
     def load(cls, filepath: Path) -> 'Project':
@@ -104,7 +129,9 @@ class Project:
             if 'raster.png' in zf.namelist():
                 with zf.open('raster.png') as img_file:
                     img = Image.open(img_file)
-                    raster_data = np.array(img)
+                    img.load()
+                    # asarray оборачивает буфер Pillow без второй копии растра
+                    raster_data = np.asarray(img)
 
             project = cls(
                 name=project_data['name'],
@@ -115,6 +142,9 @@ class Project:
 
             from models.trace import Trace, Interval, Point2D, PointType, InterpolationType
 
+            # Таблица значение -> PointType вместо вызова конструктора Enum на каждую точку
+            point_types = {ptype.value: ptype for ptype in PointType}
+
             for trace_data in project_data.get('traces', []):
                 trace = Trace(
                     id=trace_data['id'],
@@ -131,16 +161,14 @@ class Project:
                     interval = Interval(
                         id=interval_data['id'],
                         trace_id=interval_data['trace_id'],
-                        points=[],
+                        points=[Point2D(x, y, point_types[ptype])
+                                for x, y, ptype in interval_data['points']],
                         interpolation_type=InterpolationType(interval_data['interpolation_type']),
                         color=interval_data['color'],
                         is_noise=interval_data['is_noise'],
                         notes=interval_data['notes']
                     )
 
-                    for x, y, ptype in interval_data['points']:
-                        interval.points.append(Point2D(x, y, PointType(ptype)))
-
                     trace.intervals.append(interval)
 
                 project.traces.append(trace)
@@ -1,10 +1,83 @@
 # Класс данных растра
 
+import os
+import struct
 from dataclasses import dataclass, field
 from typing import Optional, Tuple, List
 from PIL import Image, ImageFile
 import numpy as np
 
+try:
+    import cv2
+
+    HAS_CV2 = True
+except ImportError:
+    HAS_CV2 = False
+
+# Поля BMP с 10-го байта: смещение пикселей, размер DIB, ширина, высота,
+# плоскости (пропуск), бит на пиксель, сжатие, размер данных и DPI (пропуск),
+# число цветов палитры
+_BMP_HEADER = struct.Struct('<IIiixxHI12xI')
+
+
+def _read_bmp_header(path: str) -> Optional[dict]:
+    """
+    Разбирает заголовок несжатого 8- или 24-битного BMP без декодеров PIL.
+
+    Returns:
+        dict с ключами data_offset, width, height (со знаком), bpp,
+        palette (None для 24 бит и градаций серого) - или None,
+        если формат не поддерживается
+    """
+    with open(path, 'rb') as f:
+        header = f.read(54)
+        if len(header) < 54 or header[:2] != b'BM':
+            return None
+        (data_offset, dib_size, width, height, bpp, compression,
+         colors_used) = _BMP_HEADER.unpack_from(header, 10)
+
+        if compression != 0 or bpp not in (8, 24) or width <= 0 or height == 0:
+            return None
+
+        palette = None
+        if bpp == 8:
+            # Палитра BGRA после DIB-заголовка -> плоский список RGB для PIL
+            count = colors_used or 256
+            f.seek(14 + dib_size)
+            entries = np.frombuffer(f.read(count * 4), dtype=np.uint8).reshape(-1, 4)
+            palette = np.ascontiguousarray(entries[:, 2::-1])
+            # Градации серого 0..255 - тайл отдается как L без палитры
+            gray = np.repeat(np.arange(256, dtype=np.uint8), 3).reshape(256, 3)
+            if palette.shape == gray.shape and np.array_equal(palette, gray):
+                palette = None
+
+    return {'data_offset': data_offset, 'width': width, 'height': height,
+            'bpp': bpp, 'palette': palette}
+
+
+def _map_bmp(path: str) -> Optional[dict]:
+    """
+    Отображает в память пиксели несжатого 8- или 24-битного BMP.
+
+    Returns:
+        dict с ключами pixels (np.memmap строк файла), width, height,
+        bottom_up, bpp, palette (None для градаций серого) - или None,
+        если формат не поддерживается
+    """
+    header = _read_bmp_header(path)
+    if header is None:
+        return None
+    width, height, bpp = header['width'], header['height'], header['bpp']
+
+    # Строки выровнены по 4 байтам; положительная высота - строки снизу вверх
+    stride = (bpp * width + 31) // 32 * 4
+    rows = abs(height)
+    pixels = np.memmap(path, dtype=np.uint8, mode='r', offset=header['data_offset'],
+                       shape=(rows, stride))
+    return {'pixels': pixels, 'width': width, 'height': rows,
+            'bottom_up': height > 0, 'bpp': bpp, 'palette': header['palette']}
+
+
 # Увеличиваем лимит PIL для больших изображений
 Image.MAX_IMAGE_PIXELS = None  # Снимаем ограничение
 ImageFile.LOAD_TRUNCATED_IMAGES = True  # Разрешаем загружать усеченные изображения
@@ -24,20 +97,49 @@ class SeismogramRaster:
     tile_size: Tuple[int, int] = (2048, 2048)  # Размер тайлов
     use_tiling: bool = True  # Использовать тайлинг для больших изображений
     preview_scale: float = 0.1  # Масштаб превью для навигации
+    # Отображение пикселей BMP в память для get_tile: (ключ состояния файла,
+    # отображение или False - формат не поддерживается)
+    _bmp_map: Optional[tuple] = field(default=None, repr=False, compare=False)
+    # Последнее превью: (ключ файла и параметров, изображение)
+    _preview_cache: Optional[tuple] = field(default=None, repr=False, compare=False)
+    # Заголовок изображения: (ключ состояния файла, (size, mode, format));
+    # файл для этого не держится открытым, пиксели не декодируются
+    _header_cache: Optional[tuple] = field(default=None, repr=False, compare=False)
+    # Разобранный заголовок BMP для get_image_info: (ключ состояния файла, dict)
+    _bmp_info: Optional[tuple] = field(default=None, repr=False, compare=False)
+
+    def _image_header(self) -> Tuple[Tuple[int, int], str, Optional[str]]:
+        """
+        Размер, режим и формат изображения.
+
+        Заголовок разбирается один раз и кэшируется до изменения файла;
+        сам файл открывается ненадолго и сразу закрывается.
+        """
+        stat = os.stat(self.image_path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        if self._header_cache is None or self._header_cache[0] != key:
+            with Image.open(self.image_path) as img:
+                self._header_cache = (key, (img.size, img.mode, img.format))
+        return self._header_cache[1]
+
+    def close(self):
+        """Освобождает отображение BMP и кэш заголовка."""
+        self._bmp_map = None
+        self._header_cache = None
 
     def load(self, load_full_image: bool = False):
         """Загружает изображение с поддержкой больших файлов."""
         try:
             if self.use_tiling and not load_full_image:
                 # Для больших изображений загружаем только метаданные
-                with Image.open(self.image_path) as img:
-                    self.pil_image = None  # Не храним полное изображение в памяти
-                    self.metadata.update({
-                        'size': img.size,
-                        'mode': img.mode,
-                        'format': img.format
-                    })
-                    print(f"Изображение {self.image_path}: {img.size[0]}x{img.size[1]}")
+                size, mode, image_format = self._image_header()
+                self.pil_image = None  # Не храним полное изображение в памяти
+                self.metadata.update({
+                    'size': size,
+                    'mode': mode,
+                    'format': image_format
+                })
+                print(f"Изображение {self.image_path}: {size[0]}x{size[1]}")
             else:
                 # Загружаем полное изображение (для маленьких файлов)
                 self.pil_image = Image.open(self.image_path)
@@ -53,44 +155,42 @@ class SeismogramRaster:
         Получает тайл (часть изображения) без загрузки всего файла в память.
         Оптимизированная версия для больших BMP файлов.
         """
+        if self.image_path.lower().endswith('.bmp'):
+            tile = self._get_bmp_tile(x, y, width, height)
+            if tile is not None:
+                return tile
+
         try:
-            with Image.open(self.image_path) as img:
-                # Получаем размеры изображения
-                img_width, img_height = img.size
+            # Получаем размеры изображения (из кэша заголовка)
+            (img_width, img_height), _, _ = self._image_header()
 
-                # Проверяем координаты
-                if x >= img_width or y >= img_height:
-                    print(f"Координаты ({x},{y}) вне границ {img_width}x{img_height}")
-                    return None
+            # Проверяем координаты
+            if x >= img_width or y >= img_height:
+                print(f"Координаты ({x},{y}) вне границ {img_width}x{img_height}")
+                return None
 
-                # Корректируем координаты
-                x = max(0, min(x, img_width - 1))
-                y = max(0, min(y, img_height - 1))
+            # Корректируем координаты
+            x = max(0, min(x, img_width - 1))
+            y = max(0, min(y, img_height - 1))
 
-                # Вычисляем реальный размер тайла
-                actual_width = min(width, img_width - x)
-                actual_height = min(height, img_height - y)
+            # Вычисляем реальный размер тайла
+            actual_width = min(width, img_width - x)
+            actual_height = min(height, img_height - y)
 
-                if actual_width <= 0 or actual_height <= 0:
-                    print(f"Нулевой размер тайла")
-                    return None
+            if actual_width <= 0 or actual_height <= 0:
+                print(f"Нулевой размер тайла")
+                return None
 
+            # Пиксели читаются из файла, открытого только на время обрезки:
+            # декодированное изображение не остается в памяти после вызова
+            with Image.open(self.image_path) as img:
                 # Для BMP файлов используем оптимизированную загрузку
                 if self.image_path.lower().endswith('.bmp'):
                     # BMP файлы могут быть большими, загружаем построчно
                     try:
-                        # Обрезаем изображение
-                        tile = img.crop((x, y, x + actual_width, y + actual_height))
-
-                        # Оптимизация для grayscale BMP
-                        if tile.mode == 'L' and actual_width * actual_height > 1000000:
-                            # Конвертируем в массив numpy для ускорения
-                            import numpy as np
-                            tile_array = np.array(tile)
-                            # Создаем новое изображение из массива
-                            tile = Image.fromarray(tile_array)
-
-                        return tile
+                        # Обрезаем изображение; crop уже возвращает отдельное
+                        # изображение, повторное копирование через numpy не нужно
+                        return img.crop((x, y, x + actual_width, y + actual_height))
 
                     except MemoryError as e:
                         # Пробуем загрузить уменьшенную версию
@@ -111,6 +211,58 @@ class SeismogramRaster:
             traceback.print_exc()
             return None
 
+    def _get_bmp_tile(self, x: int, y: int, width: int, height: int) -> Optional[Image.Image]:
+        """
+        Читает тайл несжатого BMP прямо из отображенного в память файла.
+
+        Читаются только страницы строк тайла, без декодирования всего
+        изображения. None - формат не поддерживается или тайл вне границ.
+        """
+        # Файл перезаписан - старое отображение устарело (а при уменьшении
+        # файла чтение из него аварийно завершило бы процесс)
+        try:
+            stat = os.stat(self.image_path)
+        except OSError as e:
+            print(f"Ошибка отображения BMP в память: {e}")
+            return None
+        key = (stat.st_mtime_ns, stat.st_size)
+        if self._bmp_map is None or self._bmp_map[0] != key:
+            self._bmp_map = None
+            try:
+                self._bmp_map = (key, _map_bmp(self.image_path) or False)
+            except (OSError, ValueError) as e:
+                print(f"Ошибка отображения BMP в память: {e}")
+                self._bmp_map = (key, False)
+        bmp = self._bmp_map[1]
+        if not bmp:
+            return None
+
+        img_width, img_height = bmp['width'], bmp['height']
+        if x < 0 or y < 0 or x >= img_width or y >= img_height:
+            return None
+        actual_width = min(width, img_width - x)
+        actual_height = min(height, img_height - y)
+        if actual_width <= 0 or actual_height <= 0:
+            return None
+
+        pixels = bmp['pixels']
+        if bmp['bottom_up']:
+            # Строка y изображения хранится в строке (H - 1 - y) файла
+            top = img_height - y - actual_height
+            rows = pixels[top:top + actual_height][::-1]
+        else:
+            rows = pixels[y:y + actual_height]
+
+        if bmp['bpp'] == 24:
+            # BGR -> RGB
+            tile = rows[:, x * 3:(x + actual_width) * 3].reshape(actual_height, actual_width, 3)
+            return Image.fromarray(np.ascontiguousarray(tile[:, :, ::-1]), 'RGB')
+
+        tile = Image.fromarray(np.ascontiguousarray(rows[:, x:x + actual_width]), 'L')
+        if bmp['palette'] is not None:
+            tile.putpalette(bmp['palette'].tobytes())
+        return tile
+
     def get_preview(self, max_size: Tuple[int, int] = (1920, 1080)) -> Optional[Image.Image]:
         """
         Создает превью изображения для навигации.
@@ -121,22 +273,51 @@ class SeismogramRaster:
         Returns:
             Image.Image: Уменьшенное превью
         """
+        # Повторный запрос для неизменившегося файла отдается из кэша
+        try:
+            stat = os.stat(self.image_path)
+            key = (stat.st_mtime_ns, stat.st_size, tuple(max_size), self.preview_scale)
+        except OSError:
+            key = None
+        if key is not None and self._preview_cache and self._preview_cache[0] == key:
+            return self._preview_cache[1].copy()
+
+        preview = self._build_preview(max_size)
+        if preview is not None and key is not None:
+            self._preview_cache = (key, preview.copy())
+        return preview
+
+    def _build_preview(self, max_size: Tuple[int, int]) -> Optional[Image.Image]:
+        """Строит превью по файлу (без кэша)."""
         try:
             with Image.open(self.image_path) as img:
                 # Вычисляем масштаб для уменьшения
                 width, height = img.size
+                if width <= 0 or height <= 0:
+                    return None
                 scale_x = max_size[0] / width
                 scale_y = max_size[1] / height
                 scale = min(scale_x, scale_y, 1.0) * self.preview_scale
 
                 # Уменьшаем изображение
-                new_width = int(width * scale)
-                new_height = int(height * scale)
+                new_width = max(1, int(width * scale))
+                new_height = max(1, int(height * scale))
 
-                if scale < 1.0:
-                    return img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                else:
+                # Целевой размер совпал с исходным - пересэмплирование не нужно
+                if scale >= 1.0 or (new_width, new_height) == (width, height):
                     return img.copy()
+                if not HAS_CV2:
+                    # reducing_gap: сначала целочисленное усреднение Image.reduce
+                    # до ~2x целевого размера, затем LANCZOS по малому изображению
+                    return img.resize((new_width, new_height), Image.Resampling.LANCZOS,
+                                      reducing_gap=2.0)
+
+            # OpenCV уменьшает многопоточно с SIMD; INTER_AREA при сильном
+            # уменьшении дает качество не хуже LANCZOS и считается быстрее
+            from utils.file_io import read_raster_array
+            array = read_raster_array(self.image_path)
+            return Image.fromarray(cv2.resize(array, (new_width, new_height),
+                                              interpolation=cv2.INTER_AREA))
 
         except Exception as e:
             print(f"Ошибка создания превью: {e}")
@@ -145,16 +326,32 @@ class SeismogramRaster:
     def get_image_info(self) -> dict:
         """Возвращает информацию об изображении без загрузки в память."""
         try:
-            with Image.open(self.image_path) as img:
-                return {
-                    'path': self.image_path,
-                    'size': img.size,
-                    'mode': img.mode,
-                    'format': img.format,
-                    'dpi': self.dpi,
-                    'tile_size': self.tile_size,
-                    'use_tiling': self.use_tiling
-                }
+            size = mode = image_format = None
+            if self.image_path.lower().endswith('.bmp'):
+                # Для BMP достаточно прочитать заголовок, без подбора декодера PIL
+                stat = os.stat(self.image_path)
+                key = (stat.st_mtime_ns, stat.st_size)
+                if self._bmp_info is None or self._bmp_info[0] != key:
+                    self._bmp_info = (key, _read_bmp_header(self.image_path))
+                header = self._bmp_info[1]
+                if header is not None:
+                    size = (header['width'], abs(header['height']))
+                    if header['bpp'] == 24:
+                        mode = 'RGB'
+                    else:
+                        mode = 'L' if header['palette'] is None else 'P'
+                    image_format = 'BMP'
+            if size is None:
+                size, mode, image_format = self._image_header()
+            return {
+                'path': self.image_path,
+                'size': size,
+                'mode': mode,
+                'format': image_format,
+                'dpi': self.dpi,
+                'tile_size': self.tile_size,
+                'use_tiling': self.use_tiling
+            }
         except Exception as e:
             print(f"Ошибка получения информации: {e}")
             return {}
\ No newline at end of file
@@ -83,6 +83,9 @@ class Trace:
 
     def __post_init__(self):
         self._project = None
+        # Индекс ID интервала -> позиция в списке; позиция проверяется при
+        # поиске, и индекс пересобирается, если список изменен напрямую
+        self._interval_index = {}
 
     @property
     def project(self):
@@ -94,6 +97,19 @@ class Trace:
 
     def add_interval(self, interval: Interval):
         self.intervals.append(interval)
+        self._interval_index[interval.id] = len(self.intervals) - 1
+
+    def get_interval(self, interval_id: str) -> Optional[Interval]:
+        """Найти интервал по ID (через индекс, без перебора списка)"""
+        position = self._interval_index.get(interval_id)
+        if position is not None and position < len(self.intervals):
+            interval = self.intervals[position]
+            if interval.id == interval_id:
+                return interval
+        # Список изменен в обход add_interval - пересобираем индекс
+        self._interval_index = {interval.id: i for i, interval in enumerate(self.intervals)}
+        position = self._interval_index.get(interval_id)
+        return self.intervals[position] if position is not None else None
 
     def get_all_points(self) -> List[Point2D]:
         points = []
@@ -106,4 +122,5 @@ class Trace:
         for interval in self.intervals:
             interval.points.clear()
         self.intervals.clear()
+        self._interval_index = {}
         self._project = None
\ No newline at end of file
@@ -1,9 +1,11 @@
 from .interpolation import interpolate_points, regular_digitization, fit_time_markers
 from .corrections import remove_trend, correct_time_irregularity, fix_trace_break, normalize_amplitude
-from .file_io import export_to_sac, export_to_miniseed, export_to_csv
+from .file_io import (export_to_sac, export_to_miniseed, export_to_csv, read_raster_array,
+                      import_from_numpy)
 
 __all__ = [
     'interpolate_points', 'regular_digitization', 'fit_time_markers',
     'remove_trend', 'correct_time_irregularity', 'fix_trace_break', 'normalize_amplitude',
-    'export_to_sac', 'export_to_miniseed', 'export_to_csv'
+    'export_to_sac', 'export_to_miniseed', 'export_to_csv', 'read_raster_array',
+    'import_from_numpy'
 ]
\ No newline at end of file
@@ -2,21 +2,85 @@
 
 import numpy as np
 from typing import Tuple, Optional
+from numpy.polynomial import polynomial as P
 from scipy import signal, interpolate
 
 
+# Кэш псевдообратных матриц для равномерных сеток:
+# (порядок, длина, начало, конец) -> псевдообратная (order+1 x N, float64).
+# Объем ограничен в байтах: для длинных трасс матрица велика
+_TREND_CACHE = {}
+_TREND_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def _work_dtype(amplitude: np.ndarray, dtype=None) -> np.dtype:
+    """
+    Рабочий тип вычислений над амплитудами.
+
+    Вещественные входы сохраняют свою точность; амплитуды с растра
+    (целые 8 бит) считаются в float32 - вдвое меньше трафика памяти,
+    чем в float64.
+    """
+    if dtype is not None:
+        return np.dtype(dtype)
+    amplitude = np.asarray(amplitude)
+    return amplitude.dtype if amplitude.dtype.kind == 'f' else np.dtype(np.float32)
+
+
+def _trend_basis(time: np.ndarray, order: int,
+                 dtype=np.float64) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Матрица Вандермонда для сетки времени и ее псевдообратная.
+
+    Равномерная сетка однозначно задается длиной и крайними отсчетами:
+    по ним кэшируется псевдообратная, и SVD для трасс на общей сетке
+    выполняется один раз. Матрица Вандермонда строится заново (это один
+    проход по сетке) в рабочем типе dtype; псевдообратная - в float64.
+    """
+    time = np.asarray(time, dtype=np.float64)
+    n = len(time)
+
+    # Центрирование и масштабирование улучшают обусловленность
+    span = np.ptp(time) or 1.0
+    vander = P.polyvander((time - time.mean()) / span, order)
+
+    uniform = n > 1 and np.allclose(time, np.linspace(time[0], time[-1], n),
+                                    rtol=0.0, atol=1e-9 * span)
+    if not uniform:
+        return vander.astype(dtype, copy=False), np.linalg.pinv(vander)
+
+    key = (order, n, float(time[0]), float(time[-1]))
+    pinv = _TREND_CACHE.get(key)
+    if pinv is None:
+        pinv = np.linalg.pinv(vander)
+        if pinv.nbytes <= _TREND_CACHE_BYTES:
+            # Вытесняем самые старые записи, пока новая не поместится
+            while sum(m.nbytes for m in _TREND_CACHE.values()) + pinv.nbytes > _TREND_CACHE_BYTES:
+                _TREND_CACHE.pop(next(iter(_TREND_CACHE)))
+            _TREND_CACHE[key] = pinv
+    return vander.astype(dtype, copy=False), pinv
+
+
 def remove_trend(time: np.ndarray, amplitude: np.ndarray,
-                 polynomial_order: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+                 polynomial_order: int = 1,
+                 dtype=None) -> Tuple[np.ndarray, np.ndarray]:
     """
     Удаляет полиномиальный тренд из сигнала.
+
+    dtype - тип результата (по умолчанию тип вещественного входа,
+    для целых амплитуд - float32).
     """
     if len(time) != len(amplitude):
         raise ValueError("Длины массивов времени и амплитуды должны совпадать")
 
-    # Аппроксимируем тренд полиномом
-    coeffs = np.polyfit(time, amplitude, polynomial_order)
-    trend_poly = np.poly1d(coeffs)
-    trend = trend_poly(time)
+    dtype = _work_dtype(amplitude, dtype)
+    amplitude = np.asarray(amplitude, dtype=dtype)
+
+    # Аппроксимируем тренд полиномом (МНК через кэшированную псевдообратную);
+    # коэффициенты считаются в float64, длинные массивы - в рабочем типе
+    vander, pinv = _trend_basis(time, polynomial_order, dtype)
+    coeffs = pinv @ amplitude.astype(np.float64, copy=False)
+    trend = vander @ coeffs.astype(dtype)
 
     # Удаляем тренд
     amplitude_detrended = amplitude - trend
@@ -24,6 +88,30 @@ def remove_trend(time: np.ndarray, amplitude: np.ndarray,
     return amplitude_detrended, trend
 
 
+# Кэш (хэш меток, хэш поправок) -> сплайн поправки времени
+_CORRECTION_CACHE = {}
+_CORRECTION_CACHE_SIZE = 16
+
+
+def _correction_spline(time_marks: np.ndarray,
+                       time_correction: np.ndarray) -> interpolate.CubicSpline:
+    """
+    Естественный кубический сплайн поправки времени по меткам.
+
+    Для повторной коррекции с теми же метками сплайн строится один раз.
+    """
+    time_marks = np.ascontiguousarray(time_marks, dtype=np.float64)
+    time_correction = np.ascontiguousarray(time_correction, dtype=np.float64)
+    key = (hash(time_marks.tobytes()), hash(time_correction.tobytes()))
+    spline = _CORRECTION_CACHE.get(key)
+    if spline is None:
+        spline = interpolate.CubicSpline(time_marks, time_correction, bc_type='natural')
+        if len(_CORRECTION_CACHE) >= _CORRECTION_CACHE_SIZE:
+            _CORRECTION_CACHE.pop(next(iter(_CORRECTION_CACHE)))
+        _CORRECTION_CACHE[key] = spline
+    return spline
+
+
 def correct_time_irregularity(time_marks: np.ndarray,
                               expected_times: np.ndarray,
                               signal_time: np.ndarray,
@@ -46,18 +134,33 @@ def correct_time_irregularity(time_marks: np.ndarray,
     # Интерполируем поправку времени
     time_correction = expected_times - time_marks
 
-    # Интерполируем поправку на временную сетку сигнала
-    correction_interp = np.interp(signal_time, time_marks, time_correction)
-
-    # Применяем поправку
-    corrected_time = signal_time + correction_interp
+    # Интерполируем поправку на временную сетку сигнала и применяем ее
+    # на месте, без отдельного массива поправки
+    # Сплайну нужны строго возрастающие узлы: метки сортируются вместе
+    # с поправками, из повторяющихся берется первая
+    marks, first = np.unique(np.asarray(time_marks, dtype=np.float64), return_index=True)
+    marks_correction = np.asarray(time_correction, dtype=np.float64)[first]
+    if len(marks) >= 3:
+        # Гладкая поправка кэшированным сплайном; за крайними метками
+        # поправка постоянна, как у линейной интерполяции
+        spline = _correction_spline(marks, marks_correction)
+        corrected_time = spline(np.clip(signal_time, marks[0], marks[-1]))
+    else:
+        corrected_time = np.interp(signal_time, marks, marks_correction)
+    corrected_time += signal_time
 
     # Ресэмплируем сигнал на равномерную временную сетку
     # (если исходная сетка была неравномерной)
-    if len(corrected_time) > 1:
+    n = len(corrected_time)
+    if n > 1:
         dt = np.diff(corrected_time)
-        if np.std(dt) / np.mean(dt) > 0.01:  # Если сетка неравномерная
-            regular_time = np.linspace(corrected_time.min(), corrected_time.max(), len(corrected_time))
+        mean_dt = (corrected_time[-1] - corrected_time[0]) / (n - 1)
+        # std(dt) / mean(dt) > 0.01 без промежуточного массива отклонений
+        dt -= mean_dt
+        # При mean_dt <= 0 (убывающая шкала) отношение не больше 0.01 -
+        # как и раньше, ресэмплинг не выполняется
+        if mean_dt > 0 and np.sqrt(np.dot(dt, dt) / len(dt)) > 0.01 * mean_dt:  # Если сетка неравномерная
+            regular_time = np.linspace(corrected_time.min(), corrected_time.max(), n)
             amplitude_interp = np.interp(regular_time, corrected_time, signal_amplitude)
             return regular_time, amplitude_interp
 
@@ -92,41 +195,55 @@ def fix_trace_break(time: np.ndarray, amplitude: np.ndarray,
         return amplitude.copy()
 
     amplitude_fixed = amplitude.copy()
+    n = len(amplitude)
 
-    for idx in break_indices:
-        if idx < window_size or idx > len(amplitude) - window_size - 1:
-            continue
+    # Разрывы, вокруг которых помещаются оба окна
+    idx = np.asarray(break_indices, dtype=np.intp)
+    idx = idx[(idx >= window_size) & (idx <= n - window_size - 1)]
+    if len(idx) == 0:
+        return amplitude_fixed
 
-        # Вычисляем смещение до и после разрыва
-        before_mean = np.mean(amplitude[idx - window_size:idx])
-        after_mean = np.mean(amplitude[idx + 1:idx + window_size + 1])
-        offset = after_mean - before_mean
+    # Средние окон до и после каждого разрыва через префиксные суммы
+    csum = np.concatenate(([0.0], np.cumsum(amplitude, dtype=np.float64)))
+    before_mean = (csum[idx] - csum[idx - window_size]) / window_size
+    after_mean = (csum[idx + window_size + 1] - csum[idx + 1]) / window_size
 
-        # Корректируем часть после разрыва
-        amplitude_fixed[idx + 1:] -= offset
+    # Смещение разрыва действует на все отсчеты после него: суммарная
+    # поправка - накопленная сумма смещений, вычитается за один проход
+    offsets = np.zeros(n)
+    np.add.at(offsets, idx + 1, after_mean - before_mean)
+    amplitude_fixed -= np.cumsum(offsets)
 
     return amplitude_fixed
 
 
 def normalize_amplitude(amplitude: np.ndarray,
-                        method: str = 'zscore') -> np.ndarray:
+                        method: str = 'zscore',
+                        dtype=None) -> np.ndarray:
     """
     Нормализует амплитуду сигнала.
 
     Args:
         amplitude: Амплитуды сигнала
         method: Метод нормализации ('zscore', 'minmax', 'rms')
+        dtype: Тип результата (по умолчанию тип вещественного входа,
+            для целых амплитуд - float32)
 
     Returns:
         normalized_amplitude: Нормализованные амплитуды
     """
+    # Одна выходная копия, дальше операции выполняются в ней на месте;
+    # редукции накапливаются в float64 независимо от рабочего типа
+    amplitude = np.asarray(amplitude, dtype=_work_dtype(amplitude, dtype))
+
     if method == 'zscore':
         # Z-score нормализация
-        mean = np.mean(amplitude)
-        std = np.std(amplitude)
-        if std == 0:
-            return amplitude - mean
-        return (amplitude - mean) / std
+        mean = amplitude.mean(dtype=np.float64)
+        std = amplitude.std(dtype=np.float64)
+        out = np.subtract(amplitude, amplitude.dtype.type(mean))
+        if std != 0:
+            out *= amplitude.dtype.type(1.0 / std)
+        return out
 
     elif method == 'minmax':
         # Min-Max нормализация к [-1, 1]
@@ -134,14 +251,17 @@ def normalize_amplitude(amplitude: np.ndarray,
         max_val = np.max(amplitude)
         if max_val == min_val:
             return np.zeros_like(amplitude)
-        return 2 * (amplitude - min_val) / (max_val - min_val) - 1
+        out = np.subtract(amplitude, min_val)
+        out *= amplitude.dtype.type(2.0 / (float(max_val) - float(min_val)))
+        out -= 1
+        return out
 
     elif method == 'rms':
-        # Нормализация по RMS
-        rms = np.sqrt(np.mean(amplitude ** 2))
+        # Нормализация по RMS (скалярное произведение без массива квадратов)
+        rms = np.sqrt(np.dot(amplitude, amplitude) / amplitude.size)
         if rms == 0:
             return amplitude
-        return amplitude / rms
+        return amplitude * amplitude.dtype.type(1.0 / rms)
 
     else:
         raise ValueError(f"Неизвестный метод нормализации: {method}")
\ No newline at end of file
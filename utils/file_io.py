@@ -2,6 +2,9 @@
 Утилиты для импорта/экспорта данных в различные форматы.
 """
 
+import json
+import os
+import struct
 import numpy as np
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional, Any
@@ -16,6 +19,222 @@ except ImportError:
     HAS_OBSPY = False
     warnings.warn("ObsPy не установлен. Экспорт в SAC/MiniSEED недоступен.")
 
+try:
+    import cv2
+
+    HAS_CV2 = True
+except ImportError:
+    HAS_CV2 = False
+
+
+def read_raster_array(filepath: str) -> np.ndarray:
+    """
+    Читает растровое изображение в массив uint8 (градации серого или RGB).
+
+    Если установлен OpenCV, файл читается и декодируется в C без
+    удержания GIL, поэтому интерфейс не блокируется фоновой загрузкой.
+    Иначе BMP и PNG декодирует Qt, остальные форматы - PIL.
+
+    Args:
+        filepath: Путь к изображению
+
+    Returns:
+        np.ndarray: Массив (H, W) для градаций серого или (H, W, 3) для RGB
+    """
+    if HAS_CV2:
+        # np.fromfile + imdecode корректно работают с не-ASCII путями
+        image = cv2.imdecode(np.fromfile(filepath, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+        if image is not None and image.dtype == np.uint8:
+            if image.ndim == 2:
+                return image
+            if image.shape[2] == 3:
+                return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            if image.shape[2] == 4:
+                return cv2.cvtColor(image, cv2.COLOR_BGRA2RGB)
+
+    # Без OpenCV BMP и PNG декодирует Qt (C++, без промежуточного
+    # изображения PIL)
+    if Path(filepath).suffix.lower() in ('.bmp', '.png'):
+        image = _read_with_qimage(filepath)
+        if image is not None:
+            return image
+
+    # Глубина > 8 бит, редкие форматы или нет OpenCV - через PIL
+    from PIL import Image
+
+    with Image.open(filepath) as img:
+        if img.mode != 'L':
+            img = img.convert('RGB')
+        # asarray оборачивает буфер Pillow без второй копии растра
+        img.load()
+        return np.asarray(img, dtype=np.uint8)
+
+
+def _read_with_qimage(filepath: str) -> Optional[np.ndarray]:
+    """
+    Декодирует изображение средствами Qt в массив uint8 (L или RGB).
+
+    Returns:
+        np.ndarray или None, если Qt недоступен или не смог прочитать файл
+    """
+    try:
+        from PyQt5.QtGui import QImage
+    except ImportError:
+        return None
+
+    qimage = QImage(filepath)
+    if qimage.isNull():
+        return None
+
+    if qimage.isGrayscale():
+        qimage = qimage.convertToFormat(QImage.Format_Grayscale8)
+        channels = 1
+    else:
+        qimage = qimage.convertToFormat(QImage.Format_RGB888)
+        channels = 3
+
+    width, height = qimage.width(), qimage.height()
+    bits = qimage.constBits()
+    bits.setsize(qimage.sizeInBytes())
+    # Строки QImage выровнены по 4 байтам - отрезаем хвост и копируем,
+    # т.к. буфер принадлежит QImage
+    rows = np.frombuffer(bits, dtype=np.uint8).reshape(height, qimage.bytesPerLine())
+    image = rows[:, :width * channels].copy()
+    if channels == 3:
+        image = image.reshape(height, width, 3)
+    return image
+
+
+def _sampling_rate(time: np.ndarray) -> float:
+    """
+    Частота дискретизации по временной шкале.
+
+    Среднее np.diff(time) равно (t[-1] - t[0]) / (N - 1): считается по
+    крайним отсчетам, без промежуточного массива разностей.
+    """
+    if len(time) < 2 or time[-1] == time[0]:
+        return 1.0
+    return (len(time) - 1) / float(time[-1] - time[0])
+
+
+def _build_obspy_trace(time: np.ndarray, amplitude: np.ndarray,
+                       metadata: Dict[str, Any] = None, with_calib: bool = False):
+    """Создает трассу ObsPy с заголовком из метаданных."""
+    metadata = metadata or {}
+    header = {
+        'sampling_rate': _sampling_rate(time),
+        'starttime': UTCDateTime(metadata.get('starttime', '2000-01-01T00:00:00')),
+        'npts': len(amplitude),
+        'station': metadata.get('station', 'STA'),
+        'network': metadata.get('network', 'XX'),
+        'location': metadata.get('location', ''),
+        'channel': metadata.get('channel', 'BHZ')
+    }
+    if with_calib:
+        header['calib'] = metadata.get('calib', 1.0)
+    return Trace(data=amplitude, header=header)
+
+
+def _build_sac_trace(time: np.ndarray, amplitude: np.ndarray,
+                     metadata: Dict[str, Any] = None):
+    """Создает SAC трассу с дополнительными полями заголовка из метаданных."""
+    sac_trace = SACTrace.from_obspy_trace(
+        _build_obspy_trace(time, amplitude, metadata, with_calib=True))
+
+    # Заполняем дополнительные поля SAC заголовка
+    if metadata:
+        for key, value in metadata.items():
+            if hasattr(sac_trace, key):
+                try:
+                    setattr(sac_trace, key, value)
+                except:
+                    pass
+    return sac_trace
+
+
+# Ключи метаданных, которые SAC-писатель без ObsPy переносит в заголовок
+# так же, как SACTrace (остальные поля generate_metadata_from_project
+# в заголовок SAC не попадают); с прочими ключами используется ObsPy
+_SAC_NATIVE_KEYS = {
+    'starttime', 'station', 'network', 'location', 'channel', 'calib', 'scale',
+    'units', 'latitude', 'longitude', 'elevation', 'depth', 'azimuth', 'dip',
+}
+
+# Заголовок SAC (версия 6): 70 float, 40 int, 24 строки по 8 байт (kevnm - 16)
+_SAC_UNDEF_FLOAT = -12345.0
+_SAC_UNDEF_INT = -12345
+_SAC_UNDEF_STRING = b'-12345  '
+_SAC_STRINGS = ['kstnm', 'kevnm', 'khole', 'ko', 'ka', 'kt0', 'kt1', 'kt2', 'kt3',
+                'kt4', 'kt5', 'kt6', 'kt7', 'kt8', 'kt9', 'kf', 'kuser0', 'kuser1',
+                'kuser2', 'kcmpnm', 'knetwk', 'kdatrd', 'kinst']
+# Индексы полей в блоках float и int заголовка
+_SAC_F_DELTA, _SAC_F_DEPMIN, _SAC_F_DEPMAX, _SAC_F_SCALE = 0, 1, 2, 3
+_SAC_F_B, _SAC_F_E, _SAC_F_DEPMEN = 5, 6, 56
+_SAC_I_NZYEAR, _SAC_I_NVHDR, _SAC_I_NPTS = 0, 6, 9
+_SAC_I_IFTYPE, _SAC_I_IZTYPE, _SAC_I_LEVEN, _SAC_I_LOVROK, _SAC_I_LCALDA = 15, 17, 35, 37, 38
+_SAC_ITIME, _SAC_IB = 1, 9
+
+
+def _write_sac_native(time: np.ndarray, amplitude: np.ndarray, output_path: str,
+                      metadata: Dict[str, Any], little_endian: bool = True):
+    """
+    Записывает равномерную трассу в SAC без ObsPy.
+
+    Заголовок (632 байта) собирается в массивах NumPy, данные пишутся
+    как float32 нужного порядка байт одним вызовом write.
+    """
+    from datetime import datetime
+
+    order = '<' if little_endian else '>'
+    data = np.ascontiguousarray(amplitude, dtype=order + 'f4')
+
+    floats = np.full(70, _SAC_UNDEF_FLOAT, dtype=order + 'f4')
+    ints = np.full(40, _SAC_UNDEF_INT, dtype=order + 'i4')
+
+    delta = 1.0 / _sampling_rate(time)
+    floats[_SAC_F_DELTA] = delta
+    floats[_SAC_F_B] = 0.0
+    floats[_SAC_F_E] = delta * (len(data) - 1)
+    floats[_SAC_F_SCALE] = metadata.get('scale', metadata.get('calib', 1.0))
+    if len(data):
+        floats[_SAC_F_DEPMIN] = data.min()
+        floats[_SAC_F_DEPMAX] = data.max()
+        floats[_SAC_F_DEPMEN] = data.mean(dtype=np.float64)
+
+    # Опорное время - начало трассы
+    start = metadata.get('starttime', '2000-01-01T00:00:00')
+    if not isinstance(start, datetime):
+        start = datetime.fromisoformat(str(start).rstrip('Z'))
+    ints[_SAC_I_NZYEAR:_SAC_I_NZYEAR + 6] = (
+        start.year, start.timetuple().tm_yday, start.hour, start.minute,
+        start.second, start.microsecond // 1000)
+    ints[_SAC_I_NVHDR] = 6
+    ints[_SAC_I_NPTS] = len(data)
+    ints[_SAC_I_IFTYPE] = _SAC_ITIME
+    ints[_SAC_I_IZTYPE] = _SAC_IB
+    ints[_SAC_I_LEVEN] = 1
+    ints[_SAC_I_LOVROK] = 1
+    ints[_SAC_I_LCALDA] = 1
+
+    values = {
+        'kstnm': metadata.get('station', 'STA'),
+        'khole': metadata.get('location', ''),
+        'kcmpnm': metadata.get('channel', 'BHZ'),
+        'knetwk': metadata.get('network', 'XX'),
+    }
+    strings = bytearray()
+    for name in _SAC_STRINGS:
+        width = 16 if name == 'kevnm' else 8
+        value = values.get(name)
+        if value:
+            strings += str(value).encode('ascii')[:width].ljust(width)
+        else:
+            strings += _SAC_UNDEF_STRING.ljust(width)
+
+    with open(output_path, 'wb') as f:
+        f.write(floats.tobytes() + ints.tobytes() + bytes(strings))
+        f.write(memoryview(data).cast('B'))
+
 
 def export_to_sac(time: np.ndarray, amplitude: np.ndarray,
                   output_path: str, metadata: Dict[str, Any] = None,
@@ -33,39 +252,23 @@ def export_to_sac(time: np.ndarray, amplitude: np.ndarray,
     Returns:
         bool: Успешность экспорта
     """
+    # Стандартные поля пишутся напрямую, без промежуточных трасс ObsPy
+    if not set(metadata or {}) - _SAC_NATIVE_KEYS:
+        try:
+            _write_sac_native(time, amplitude, output_path, metadata or {}, little_endian)
+            return True
+        except Exception as e:
+            if not HAS_OBSPY:
+                print(f"Ошибка экспорта в SAC: {e}")
+                return False
+
     if not HAS_OBSPY:
         warnings.warn("ObsPy не установлен. Экспорт в SAC недоступен.")
         return False
 
     try:
-        # Создаем трассу ObsPy
-        sampling_rate = 1.0 / np.mean(np.diff(time)) if len(time) > 1 else 1.0
-        starttime = UTCDateTime(metadata.get('starttime', '2000-01-01T00:00:00'))
-
-        trace = Trace(data=amplitude, header={
-            'sampling_rate': sampling_rate,
-            'starttime': starttime,
-            'npts': len(amplitude),
-            'calib': metadata.get('calib', 1.0),
-            'station': metadata.get('station', 'STA'),
-            'network': metadata.get('network', 'XX'),
-            'location': metadata.get('location', ''),
-            'channel': metadata.get('channel', 'BHZ')
-        })
-
-        # Создаем SAC трассу
-        sac_trace = SACTrace.from_obspy_trace(trace)
-
-        # Заполняем дополнительные поля SAC заголовка
-        if metadata:
-            for key, value in metadata.items():
-                if hasattr(sac_trace, key):
-                    try:
-                        setattr(sac_trace, key, value)
-                    except:
-                        pass
-
         # Сохраняем файл
+        sac_trace = _build_sac_trace(time, amplitude, metadata)
         sac_trace.write(output_path, byteorder='little' if little_endian else 'big')
         return True
 
@@ -96,22 +299,8 @@ def export_to_miniseed(time: np.ndarray, amplitude: np.ndarray,
         return False
 
     try:
-        # Создаем трассу ObsPy
-        sampling_rate = 1.0 / np.mean(np.diff(time)) if len(time) > 1 else 1.0
-        starttime = UTCDateTime(metadata.get('starttime', '2000-01-01T00:00:00'))
-
-        trace = Trace(data=amplitude, header={
-            'sampling_rate': sampling_rate,
-            'starttime': starttime,
-            'npts': len(amplitude),
-            'station': metadata.get('station', 'STA'),
-            'network': metadata.get('network', 'XX'),
-            'location': metadata.get('location', ''),
-            'channel': metadata.get('channel', 'BHZ')
-        })
-
         # Создаем поток и сохраняем в MiniSEED
-        stream = Stream([trace])
+        stream = Stream([_build_obspy_trace(time, amplitude, metadata)])
         stream.write(output_path, format='MSEED',
                      encoding=encoding, reclen=record_length)
         return True
@@ -121,6 +310,10 @@ def export_to_miniseed(time: np.ndarray, amplitude: np.ndarray,
         return False
 
 
+# Строк CSV, форматируемых за один проход (ограничивает размер строки в памяти)
+_CSV_BLOCK_ROWS = 65536
+
+
 def export_to_csv(time: np.ndarray, amplitude: np.ndarray,
                   output_path: str, delimiter: str = ',',
                   header: bool = True) -> bool:
@@ -143,13 +336,17 @@ def export_to_csv(time: np.ndarray, amplitude: np.ndarray,
             print("Длины массивов времени и амплитуды не совпадают")
             return False
 
-        # Сохраняем в CSV
-        data = np.column_stack((time, amplitude))
-        header_line = f"time{delimiter}amplitude\n" if header else ""
-
-        np.savetxt(output_path, data, delimiter=delimiter,
-                   header=header_line if header else '',
-                   comments='')
+        # Сохраняем в CSV: блок строк форматируется одной операцией %
+        # над кортежем значений и пишется одним вызовом write (формат
+        # чисел тот же, что у np.savetxt по умолчанию)
+        data = np.column_stack((time, amplitude)).astype(np.float64, copy=False)
+        row = f"%.18e{delimiter}%.18e\n"
+        with open(output_path, 'w', encoding='utf-8', newline='') as f:
+            if header:
+                f.write(f"time{delimiter}amplitude\n\n")
+            for start in range(0, len(data), _CSV_BLOCK_ROWS):
+                block = data[start:start + _CSV_BLOCK_ROWS]
+                f.write((row * len(block)) % tuple(block.ravel().tolist()))
         return True
 
     except Exception as e:
@@ -157,11 +354,45 @@ def export_to_csv(time: np.ndarray, amplitude: np.ndarray,
         return False
 
 
+# Граница выравнивания данных .npy: массив начинается с новой страницы,
+# mmap и блочное чтение не захватывают страницу заголовка
+_NPY_ALIGN = 4096
+
+
+def _save_npy_aligned(path: str, array: np.ndarray):
+    """
+    Сохраняет массив в .npy (версия 1.0), дополняя заголовок пробелами
+    так, чтобы данные начинались с границы _NPY_ALIGN байт.
+    """
+    from numpy.lib import format as npy_format
+
+    array = np.ascontiguousarray(array)
+    header = repr({
+        'descr': npy_format.dtype_to_descr(array.dtype),
+        'fortran_order': False,
+        'shape': array.shape,
+    }).encode('latin1')
+    # Магия (6) + версия (2) + длина заголовка (2) + заголовок + '\n'
+    prefix = len(npy_format.MAGIC_PREFIX) + 4
+    padding = -(prefix + len(header) + 1) % _NPY_ALIGN
+    header += b' ' * padding + b'\n'
+
+    with open(path, 'wb') as f:
+        f.write(npy_format.magic(1, 0))
+        f.write(struct.pack('<H', len(header)))
+        f.write(header)
+        f.write(memoryview(array).cast('B'))
+
+
 def export_to_numpy(time: np.ndarray, amplitude: np.ndarray,
                     output_path: str, metadata: Dict[str, Any] = None) -> bool:
     """
     Экспортирует данные в бинарный формат NumPy.
 
+    Время и амплитуда сохраняются одним массивом формы (2, N) с данными,
+    выровненными по 4 КиБ (np.load(..., mmap_mode='r') читает без pickle),
+    метаданные - в JSON рядом с файлом (<имя>.npy.json).
+
     Args:
         time: Временные метки
         amplitude: Амплитуды
@@ -172,14 +403,21 @@ def export_to_numpy(time: np.ndarray, amplitude: np.ndarray,
         bool: Успешность экспорта
     """
     try:
-        # Сохраняем данные и метаданные
-        data_dict = {
-            'time': time,
-            'amplitude': amplitude,
-            'metadata': metadata or {}
-        }
+        if len(time) != len(amplitude):
+            print("Длины массивов времени и амплитуды не совпадают")
+            return False
 
-        np.save(output_path, data_dict, allow_pickle=True)
+        # Как и np.save, добавляем расширение, если его нет
+        if not output_path.endswith('.npy'):
+            output_path += '.npy'
+
+        data = np.empty((2, len(time)), dtype=np.float64)
+        data[0] = time
+        data[1] = amplitude
+        _save_npy_aligned(output_path, data)
+
+        with open(output_path + '.json', 'w', encoding='utf-8') as f:
+            json.dump(metadata or {}, f, ensure_ascii=False, indent=2, default=str)
         return True
 
     except Exception as e:
@@ -187,6 +425,33 @@ def export_to_numpy(time: np.ndarray, amplitude: np.ndarray,
         return False
 
 
+def import_from_numpy(path: str) -> Tuple[np.ndarray, np.ndarray, Dict[str, Any]]:
+    """
+    Читает трассу, сохраненную export_to_numpy.
+
+    Массив отображается в память (mmap_mode='r'): time и amplitude -
+    представления строк без копирования и без pickle.
+
+    Args:
+        path: Путь к файлу .npy
+
+    Returns:
+        time, amplitude, metadata: Временные метки, амплитуды (только чтение)
+        и метаданные из JSON рядом с файлом
+    """
+    data = np.load(path, mmap_mode='r', allow_pickle=False)
+    if data.ndim != 2 or data.shape[0] != 2:
+        raise ValueError(f"Ожидался массив формы (2, N), получен {data.shape}")
+
+    metadata = {}
+    metadata_path = Path(path + '.json')
+    if metadata_path.exists():
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+
+    return data[0], data[1], metadata
+
+
 def export_to_matlab(time: np.ndarray, amplitude: np.ndarray,
                      output_path: str, variable_name: str = 'seismic_data') -> bool:
     """
@@ -208,7 +473,7 @@ def export_to_matlab(time: np.ndarray, amplitude: np.ndarray,
         data = {
             'time': time,
             'amplitude': amplitude,
-            'sampling_rate': 1.0 / np.mean(np.diff(time)) if len(time) > 1 else 1.0
+            'sampling_rate': _sampling_rate(time)
         }
 
         # Сохраняем в .mat файл
@@ -226,7 +491,8 @@ def export_to_matlab(time: np.ndarray, amplitude: np.ndarray,
 def export_multiple_traces(traces: List[Dict[str, Any]],
                            output_dir: str,
                            format: str = 'SAC',
-                           base_name: str = 'trace') -> Dict[str, bool]:
+                           base_name: str = 'trace',
+                           aggregate: bool = False) -> Dict[str, bool]:
     """
     Экспортирует несколько трасс одновременно.
 
@@ -235,48 +501,145 @@ def export_multiple_traces(traces: List[Dict[str, Any]],
         output_dir: Директория для сохранения
         format: Формат экспорта ('SAC', 'MiniSEED', 'CSV', 'NPY', 'MAT')
         base_name: Базовое имя файлов
+        aggregate: Для SAC и MiniSEED писать все трассы в один файл
+            (<base_name>.mseed или архив <base_name>.sac.tar)
 
     Returns:
         Dict: Результаты экспорта для каждой трассы
     """
+    if aggregate and format in ('SAC', 'MiniSEED'):
+        return _export_aggregated(traces, Path(output_dir), format, base_name)
+
     results = {}
     output_path = Path(output_dir)
 
+    # Формат -> (расширение, функция экспорта); выбирается один раз на вызов
+    exporter = _MULTI_EXPORTERS.get(format)
+    if exporter is None:
+        print(f"Неизвестный формат: {format}")
+    else:
+        output_path.mkdir(parents=True, exist_ok=True)
+
+    jobs = []
+    # Для повторяющихся имен результат - последней трассы с этим именем
+    last_index = {}
     for i, trace_data in enumerate(traces):
         time = trace_data.get('time')
         amplitude = trace_data.get('amplitude')
         metadata = trace_data.get('metadata', {})
         name = trace_data.get('name', f'{base_name}_{i:03d}')
+        last_index[name] = i
 
-        if time is None or amplitude is None:
+        if exporter is None or time is None or amplitude is None:
             results[name] = False
             continue
 
         # Формируем имя файла
-        if format == 'SAC':
-            filename = output_path / f'{name}.sac'
-            success = export_to_sac(time, amplitude, str(filename), metadata)
-        elif format == 'MiniSEED':
-            filename = output_path / f'{name}.mseed'
-            success = export_to_miniseed(time, amplitude, str(filename), metadata)
-        elif format == 'CSV':
-            filename = output_path / f'{name}.csv'
-            success = export_to_csv(time, amplitude, str(filename))
-        elif format == 'NPY':
-            filename = output_path / f'{name}.npy'
-            success = export_to_numpy(time, amplitude, str(filename), metadata)
-        elif format == 'MAT':
-            filename = output_path / f'{name}.mat'
-            success = export_to_matlab(time, amplitude, str(filename))
+        extension, export = exporter
+        filename = output_path / f'{name}{extension}'
+        results[name] = None
+        jobs.append((i, name, str(filename), export, (time, amplitude, str(filename), metadata)))
+
+    # Трассы с одинаковым именем пишут в один файл: такие задания
+    # выполняются последовательно (как раньше, побеждает последняя),
+    # в пул уходят только задания с уникальным путем
+    path_counts = {}
+    for _, _, path, _, _ in jobs:
+        path_counts[path] = path_counts.get(path, 0) + 1
+    parallel = [job for job in jobs if path_counts[job[2]] == 1]
+    serial = [job for job in jobs if path_counts[job[2]] > 1]
+
+    # Трассы пишутся в отдельные файлы и не зависят друг от друга:
+    # сериализация (NumPy, сжатие ObsPy, запись) идет в пуле потоков
+    if len(parallel) > 1:
+        from concurrent.futures import ThreadPoolExecutor
+
+        workers = min(len(parallel), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [(i, name, pool.submit(export, *args))
+                       for i, name, _, export, args in parallel]
+            for i, name, future in futures:
+                success = future.result()
+                if last_index[name] == i:
+                    results[name] = success
+    else:
+        serial = parallel + serial
+
+    for i, name, _, export, args in serial:
+        success = export(*args)
+        if last_index[name] == i:
+            results[name] = success
+
+    return results
+
+
+def _export_aggregated(traces: List[Dict[str, Any]], output_path: Path,
+                       format: str, base_name: str) -> Dict[str, bool]:
+    """
+    Записывает все трассы в один файл вместо файла на трассу.
+
+    MiniSEED хранит несколько потоков в одном файле; SAC такого не
+    допускает, поэтому SAC-файлы трасс последовательно пишутся в tar-архив.
+    """
+    results = {}
+    if not HAS_OBSPY:
+        warnings.warn(f"ObsPy не установлен. Экспорт в {format} недоступен.")
+        return {trace_data.get('name', f'{base_name}_{i:03d}'): False
+                for i, trace_data in enumerate(traces)}
+
+    items = []
+    for i, trace_data in enumerate(traces):
+        name = trace_data.get('name', f'{base_name}_{i:03d}')
+        time = trace_data.get('time')
+        amplitude = trace_data.get('amplitude')
+        if time is None or amplitude is None:
+            results[name] = False
+            continue
+        items.append((name, time, amplitude, trace_data.get('metadata', {})))
+
+    if not items:
+        return results
+
+    output_path.mkdir(parents=True, exist_ok=True)
+    try:
+        if format == 'MiniSEED':
+            stream = Stream([_build_obspy_trace(time, amplitude, metadata)
+                             for _, time, amplitude, metadata in items])
+            stream.write(str(output_path / f'{base_name}.mseed'), format='MSEED',
+                         encoding='STEIM2', reclen=512)
         else:
-            print(f"Неизвестный формат: {format}")
-            success = False
+            import io
+            import tarfile
+
+            with tarfile.open(output_path / f'{base_name}.sac.tar', 'w') as archive:
+                for name, time, amplitude, metadata in items:
+                    buffer = io.BytesIO()
+                    _build_sac_trace(time, amplitude, metadata).write(buffer, byteorder='little')
+                    info = tarfile.TarInfo(f'{name}.sac')
+                    info.size = buffer.tell()
+                    buffer.seek(0)
+                    archive.addfile(info, buffer)
+        success = True
 
-        results[name] = success
+    except Exception as e:
+        print(f"Ошибка экспорта в {format}: {e}")
+        success = False
 
+    for name, *_ in items:
+        results[name] = success
     return results
 
 
+# Формат export_multiple_traces -> (расширение файла, экспорт одной трассы)
+_MULTI_EXPORTERS = {
+    'SAC': ('.sac', export_to_sac),
+    'MiniSEED': ('.mseed', export_to_miniseed),
+    'CSV': ('.csv', lambda time, amplitude, path, metadata: export_to_csv(time, amplitude, path)),
+    'NPY': ('.npy', export_to_numpy),
+    'MAT': ('.mat', lambda time, amplitude, path, metadata: export_to_matlab(time, amplitude, path)),
+}
+
+
 def generate_metadata_from_project(project_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Генерирует метаданные для экспорта из данных проекта.
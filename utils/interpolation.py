@@ -1,11 +1,30 @@
 # Интерполяция
 
 import numpy as np
+from numpy.polynomial import polynomial as P
 from scipy import interpolate
 from typing import List, Tuple, Optional
 from models.seismic_data import DigitizationPoint
 
 
+def _point_coords(points) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Координаты точек в виде массивов x_px, y_px.
+
+    Контейнер с готовыми массивами x_px/y_px отдается без копирования,
+    для списка точек массивы заполняются через np.fromiter без
+    промежуточных списков Python.
+    """
+    x = getattr(points, 'x_px', None)
+    y = getattr(points, 'y_px', None)
+    if isinstance(x, np.ndarray) and isinstance(y, np.ndarray):
+        return x, y
+    count = len(points)
+    x = np.fromiter((p.x_px for p in points), dtype=np.float64, count=count)
+    y = np.fromiter((p.y_px for p in points), dtype=np.float64, count=count)
+    return x, y
+
+
 def interpolate_points(points: List[DigitizationPoint],
                        polynomial_order: int = 3,
                        num_samples: int = 100,
@@ -25,9 +44,20 @@ def interpolate_points(points: List[DigitizationPoint],
     if len(points) < 2:
         raise ValueError("Нужно как минимум 2 точки для интерполяции")
 
+    x_min, x_max, curve = _fit_curve(points, polynomial_order, use_spline)
+    x_interp = np.linspace(x_min, x_max, num_samples)
+    return x_interp, curve(x_interp)
+
+
+def _fit_curve(points, polynomial_order: int = 3, use_spline: bool = True):
+    """
+    Строит интерполирующую кривую по точкам.
+
+    Returns:
+        x_min, x_max, curve: Границы по X и функция y(x) (сплайн или полином)
+    """
     # Извлекаем координаты
-    x = np.array([p.x_px for p in points])
-    y = np.array([p.y_px for p in points])
+    x, y = _point_coords(points)
 
     # Сортируем по X
     sort_idx = np.argsort(x)
@@ -36,17 +66,14 @@ def interpolate_points(points: List[DigitizationPoint],
 
     if use_spline:
         # Кубический сплайн
-        spline = interpolate.CubicSpline(x_sorted, y_sorted)
-        x_interp = np.linspace(x_sorted.min(), x_sorted.max(), num_samples)
-        y_interp = spline(x_interp)
+        curve = interpolate.CubicSpline(x_sorted, y_sorted)
     else:
-        # Полиномиальная интерполяция
-        coeffs = np.polyfit(x_sorted, y_sorted, polynomial_order)
-        poly = np.poly1d(coeffs)
-        x_interp = np.linspace(x_sorted.min(), x_sorted.max(), num_samples)
-        y_interp = poly(x_interp)
+        # Полиномиальная интерполяция; polyval вычисляет по схеме Горнера
+        coeffs = P.polyfit(x_sorted, y_sorted, polynomial_order)
+        curve = lambda values: P.polyval(values, coeffs)
 
-    return x_interp, y_interp
+    # После сортировки границы - крайние элементы
+    return x_sorted[0], x_sorted[-1], curve
 
 
 def regular_digitization(points: List[DigitizationPoint],
@@ -70,29 +97,34 @@ def regular_digitization(points: List[DigitizationPoint],
     if len(points) < 2:
         raise ValueError("Нужно как минимум 2 точки для оцифровки")
 
-    # Интерполируем точки
-    x_interp, y_interp = interpolate_points(points, polynomial_order, use_spline=True)
+    # Интерполирующая кривая по точкам
+    x_min, x_max, spline = _fit_curve(points, polynomial_order, use_spline=True)
+    # Инвертируем Y, так как в изображениях ось Y направлена вниз; диапазон
+    # берется по исходным точкам, а не по пересэмплированной кривой
+    _, y_points = _point_coords(points)
+    y_flip = y_points.max() + y_points.min()
 
     # Преобразуем координаты X во время
     # Предполагаем линейную зависимость между координатой X и временем
-    x_min = x_interp.min()
-    x_max = x_interp.max()
-
-    # Линейное преобразование X -> время
-    time = time_start + (x_interp - x_min) * (time_end - time_start) / (x_max - x_min)
+    time_scale = (time_end - time_start) / (x_max - x_min)
 
-    # Преобразуем координаты Y в амплитуду
-    # Инвертируем Y, так как в изображениях ось Y направлена вниз
-    amplitude = y_interp.max() + y_interp.min() - y_interp
-
-    # Ресэмплируем на регулярную сетку, если нужно
     if sampling_rate > 0:
         regular_time = np.arange(time_start, time_end, 1.0 / sampling_rate)
         if len(regular_time) > 0:
-            amplitude_regular = np.interp(regular_time, time, amplitude)
+            # Сплайн вычисляется сразу в точках регулярной сетки: время
+            # переводится обратно в X одним аффинным преобразованием, без
+            # промежуточной сетки и повторной линейной интерполяции
+            x_regular = (regular_time - time_start) * (1.0 / time_scale)
+            x_regular += x_min
+            np.clip(x_regular, x_min, x_max, out=x_regular)
+            amplitude_regular = spline(x_regular)
+            np.subtract(y_flip, amplitude_regular, out=amplitude_regular)
             return regular_time, amplitude_regular
 
-    return time, amplitude
+    # Без ресэмплинга - 100 опорных точек кривой
+    x_interp = np.linspace(x_min, x_max, 100)
+    time = time_start + (x_interp - x_min) * time_scale
+    return time, y_flip - spline(x_interp)
 
 
 def fit_time_markers(points: List[DigitizationPoint],
@@ -111,17 +143,22 @@ def fit_time_markers(points: List[DigitizationPoint],
     if len(points) != len(expected_times):
         raise ValueError("Количество точек должно совпадать с количеством ожидаемых времен")
 
-    x = np.array([p.x_px for p in points])
-    t = np.array(expected_times)
-
-    # Линейная регрессия (можно расширить до полиномиальной)
-    coeffs = np.polyfit(x, t, 1)
-
-    # Вычисляем R²
-    poly = np.poly1d(coeffs)
-    y_pred = poly(x)
-    ss_res = np.sum((t - y_pred) ** 2)
-    ss_tot = np.sum((t - np.mean(t)) ** 2)
+    x, _ = _point_coords(points)
+    t = np.asarray(expected_times, dtype=np.float64)
+
+    # Линейная регрессия в замкнутом виде (центрированные суммы вместо
+    # матрицы Вандермонда и SVD); коэффициенты в порядке np.polyfit
+    dx = x - x.mean()
+    dt = t - t.mean()
+    sxx = np.dot(dx, dx)
+    slope = np.dot(dx, dt) / sxx if sxx != 0 else 0.0
+    intercept = t.mean() - slope * x.mean()
+    coeffs = np.array([slope, intercept])
+
+    # Вычисляем R²: остаток - отклонение от прямой
+    residual = dt - slope * dx
+    ss_res = np.dot(residual, residual)
+    ss_tot = np.dot(dt, dt)
     r_squared = 1 - (ss_res / ss_tot) if ss_tot != 0 else 1.0
 
     return coeffs, r_squared
\ No newline at end of file